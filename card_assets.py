@@ -0,0 +1,83 @@
+from PIL import Image
+from collections import OrderedDict
+import os, threading
+
+# --- Decoded/resized image cache ---
+# Entries are keyed by (path, size) and remember the file's mtime; a lookup after the file
+# changed on disk drops every entry for that path. Images handed out are shared: copy before drawing.
+ASSET_CACHE_BYTES = 256 * 1024 * 1024
+
+def image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+class ImageCache:
+    def __init__(self, max_bytes=ASSET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()   # (path, size) -> (mtime, image)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    # Each call counts one hit or miss, for the (path, size) asked for; fetching the
+    # full-size image to resize from is not counted separately
+    def get(self, path, size=None, scale=None):
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            img, cached = self._base(path, mtime)
+            if size is not None or scale is not None:
+                if size is None:
+                    size = (img.width*scale, img.height*scale)
+                size = (max(1, int(size[0])), max(1, int(size[1])))
+                if size != img.size:
+                    key, base = (path, size), img
+                    img = self._lookup(key, mtime)
+                    cached = img is not None
+                    if not cached:
+                        img = base.resize(size)
+                        self._put(key, mtime, img)
+            self.stats["hits" if cached else "misses"] += 1
+            return img
+
+    # Full-size image for path, decoding it if needed; returns (image, was cached). No stats.
+    def _base(self, path, mtime):
+        img = self._lookup((path, None), mtime)
+        if img is not None:
+            return img, True
+        img = Image.open(path).convert("RGBA")
+        self._put((path, None), mtime, img)
+        return img, False
+
+    # Cached image for key if still current; a stale entry drops every entry for its path
+    def _lookup(self, key, mtime):
+        entry = self._items.get(key)
+        if entry and entry[0] == mtime:
+            self._items.move_to_end(key)
+            return entry[1]
+        if entry:
+            self.invalidate(key[0])
+        return None
+
+    def _put(self, key, mtime, img):
+        self._items[key] = (mtime, img)
+        self._bytes += image_bytes(img)
+        while self._bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, old) = self._items.popitem(last=False)
+            self._bytes -= image_bytes(old)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [k for k in self._items if k[0] == path]:
+                self._bytes -= image_bytes(self._items.pop(key)[1])
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self._bytes = 0
+
+    def info(self):
+        return dict(self.stats, entries=len(self._items), bytes=self._bytes, max_bytes=self.max_bytes)
+
+ASSETS = ImageCache()
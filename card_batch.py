@@ -0,0 +1,224 @@
+"""Headless batch renderer: every saved_cards/*.json -> output/*.tiff, no Tk needed.
+
+    python card_batch.py [cards_dir] [-o output] [-j workers] [--background path] [--outline mode] [--no-cache]
+                         [--format tiff|png|pdf] [--compression c] [--color RGB|CMYK|RGBA]
+    python card_batch.py roster.db [-o output] ...   # every card in a card_store file
+    python card_batch.py [cards_dir] --compare-outline [changed%]   # pixel diff of each outline mode vs "square"
+    python card_batch.py [cards_dir] --check-preview [tolerance]   # preview vs downscaled final render
+"""
+from multiprocessing import Pool
+import argparse, glob, os, sys, time
+
+import card_export, card_render
+from card_cache import RENDER_CACHE
+from card_layers import LayeredCompositor
+from card_library import MECH_LIBRARY
+
+# --- Per-worker state (background loaded once per process; sprites and mechs come from the asset cache) ---
+_bg = _bg_path = None
+
+def _init_worker(bg_path):
+    global _bg, _bg_path
+    _bg, _bg_path = card_render.load_background(bg_path), bg_path
+
+# A job's card is a settings path, or a (name, card) pair already resolved from a card store
+def render_one(job):
+    src, out_dir, outline_mode, use_cache, opts = job
+    opts = opts or card_export.DEFAULT_EXPORT
+    ext = card_export.export_ext(opts)
+    path = src[0] if isinstance(src, tuple) else src
+    t0 = time.perf_counter()
+    try:
+        card = src[1] if isinstance(src, tuple) else card_render.load_card(src)
+        mech_path = card["MechImage"].get("path")
+        warn = f"mech image not found: {mech_path}" if mech_path and not card_render.resolve_mech_path(mech_path) else ""
+        out = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + "." + ext)
+        key = RENDER_CACHE.key(card, _bg_path, outline_mode, card_export.export_variant(opts)) if use_cache else None
+        t1 = time.perf_counter()
+        cached = bool(key) and RENDER_CACHE.fetch(key, out, ext)
+        if not cached:
+            img = card_render.render_card(card, _bg, outline_mode=outline_mode)
+        t2 = time.perf_counter()
+        if not cached:
+            card_export.save_card(img, out, opts)
+            if key:
+                RENDER_CACHE.store(key, out, ext)
+        t3 = time.perf_counter()
+        return {"card": path, "out": out, "load": t1-t0, "render": t2-t1, "save": t3-t2,
+                "total": t3-t0, "bytes": os.path.getsize(out), "warning": warn, "error": "", "cached": cached, "pid": os.getpid(),
+                "fonts": card_render.font_cache_info(), "assets": card_render.ASSETS.info(),
+                "dots": card_render.dot_strip_info()["strip"]}
+    except Exception as e:
+        return {"card": path, "out": "", "load": 0.0, "render": 0.0, "save": 0.0,
+                "total": time.perf_counter()-t0, "bytes": 0, "warning": "", "error": str(e)}
+
+def find_cards(src):
+    if src.endswith(".db") and os.path.isfile(src):
+        from card_store import CardStore
+        with CardStore(src) as store:
+            return list(store.iter_cards())
+    if os.path.isfile(src):
+        return [src]
+    return sorted(glob.glob(os.path.join(src, "*.json")))
+
+def render_all(paths, out_dir=card_render.OUTPUT_DIR, workers=None, bg_path=card_render.DEFAULT_BG, outline_mode=None,
+               use_cache=True, opts=None):
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    jobs = [(p, out_dir, outline_mode, use_cache, opts) for p in paths]
+    if workers == 1:
+        _init_worker(bg_path)
+        results = [render_one(j) for j in jobs]
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(bg_path,)) as pool:
+            results = list(pool.imap(render_one, jobs))
+    if use_cache:
+        RENDER_CACHE.evict()  # workers only track their own stores against the cap
+    return results
+
+def print_summary(results, wall, workers):
+    print(f"{'card':<40} {'load':>7} {'render':>7} {'save':>7} {'total':>7} {'size':>9}")
+    for r in results:
+        name = os.path.basename(r["card"])
+        if r["error"]:
+            print(f"{name:<40} FAILED: {r['error']}")
+            continue
+        print(f"{name:<40} {r['load']:7.2f} {r['render']:7.2f} {r['save']:7.2f} {r['total']:7.2f} {card_export.format_size(r['bytes']):>9}"
+              + ("  (cached)" if r["cached"] else ""))
+        if r["warning"]:
+            print(f"{'':<40} warning: {r['warning']}")
+    ok = [r for r in results if not r["error"]]
+    cpu = sum(r["total"] for r in results)
+    # Font counters are cumulative per worker process; keep the last report from each
+    fonts = {r["pid"]: r["fonts"] for r in ok}
+    hits = sum(f["hits"] for f in fonts.values()); misses = sum(f["misses"] for f in fonts.values())
+    print(f"\nfont cache: {hits} hits, {misses} misses across {len(fonts)} worker(s)")
+    assets = {r["pid"]: r["assets"] for r in ok}
+    hits = sum(a["hits"] for a in assets.values()); misses = sum(a["misses"] for a in assets.values())
+    print(f"asset cache: {hits} hits, {misses} misses")
+    strips = {r["pid"]: r["dots"] for r in ok}
+    hits = sum(s["hits"] for s in strips.values()); misses = sum(s["misses"] for s in strips.values())
+    print(f"dot strips: {hits} reused, {misses} built")
+    hits = sum(r["cached"] for r in ok)
+    print(f"render cache: {hits} hits, {len(ok) - hits} misses ({RENDER_CACHE.cache_dir})")
+    print(f"output: {card_export.format_size(sum(r['bytes'] for r in ok))} total, "
+          f"{sum(r['save'] for r in ok if not r['cached']):.2f}s encoding")
+    print(f"{len(ok)}/{len(results)} cards rendered with {workers} worker(s) in {wall:.2f}s wall "
+          f"({cpu:.2f}s summed per-card time)")
+
+# --- Outline mode comparison (reference: the original square offset loop) ---
+# The single-pass modes differ from it only in corner shape and antialiasing (about 0.15% of
+# pixels for stroke); a mode that loses or misplaces outlines goes far past these limits.
+OUTLINE_TOLERANCE = 0.5  # percent of pixels differing by more than pixel_diff's threshold
+OUTLINE_MEAN_TOLERANCE = 0.5  # mean absolute difference, 0-255 levels
+
+def compare_outline(paths, bg_path=card_render.DEFAULT_BG, tolerance=OUTLINE_TOLERANCE):
+    _init_worker(bg_path)
+    failed = 0
+    print(f"{'card':<32} {'mode':<7} {'time':>6} {'mean':>6} {'max':>4} {'changed%':>9}")
+    for src in paths:
+        path, card = src if isinstance(src, tuple) else (src, card_render.load_card(src))
+        renders = {}
+        for mode in ("square",) + tuple(m for m in card_render.OUTLINE_MODES if m != "square"):
+            t0 = time.perf_counter()
+            renders[mode] = card_render.render_card(card, _bg, outline_mode=mode)
+            dt = time.perf_counter() - t0
+            d = card_render.pixel_diff(renders["square"], renders[mode])
+            bad = d["changed_pct"] > tolerance or d["mean"] > OUTLINE_MEAN_TOLERANCE
+            failed += bad
+            print(f"{os.path.basename(path)[:32]:<32} {mode:<7} {dt:6.2f} {d['mean']:6.3f} {d['max']:4d} {d['changed_pct']:9.4f}"
+                  + ("  MISMATCH" if bad else ""))
+    return failed
+
+# --- Preview parity: the GUI compositor at PREVIEW_SCALE vs the final render ---
+# Both come from card_render.card_layers. Glyphs hinted at the smaller size never match a
+# downscaled render pixel for pixel, so each layer's box is compared as well (final box scaled
+# down vs preview box): a misplaced, resized or missing layer shows up there even when the
+# whole-card mean difference barely moves. Boxes are the inked (non-transparent) extent, since
+# sprite padding does not scale.
+PREVIEW_TOLERANCE = 4.0  # whole-card mean absolute difference, 0-255 levels
+LAYER_TOLERANCE = 4  # preview pixels a layer edge may drift from the scaled final edge
+
+def ink_box(sprite, offset):
+    box = sprite.getchannel("A").getbbox() if sprite is not None else None
+    return box and (box[0] + offset[0], box[1] + offset[1], box[2] + offset[0], box[3] + offset[1])
+
+# Checked against both mech sources the GUI can use: the full picture and library thumbnails.
+# Cards whose picture is not bundled get a bundled one, so the mech layer is always compared.
+def check_preview(paths, bg_path=card_render.DEFAULT_BG, tolerance=PREVIEW_TOLERANCE):
+    _init_worker(bg_path)
+    MECH_LIBRARY.refresh()
+    thumbs = lambda path, size: MECH_LIBRARY.scaled(path, size) or card_render.load_mech(path, size)
+    sources = {"full": LayeredCompositor(card_render.PREVIEW_SCALE),
+               "thumbs": LayeredCompositor(card_render.PREVIEW_SCALE, mech_source=thumbs)}
+    s = card_render.PREVIEW_SCALE
+    cards = card_render.fill_missing_mechs([src if isinstance(src, tuple) else (src, card_render.load_card(src))
+                                            for src in paths])
+    failed = mechs = 0
+    print(f"{'card':<32} {'mech':<7} {'mean':>6} {'max':>4} {'changed%':>9} {'layer px':>9}")
+    for path, card in cards:
+        final_img = card_render.render_card(card, _bg)
+        final_layers = {name: ink_box(*render()) for name, _, render in card_render.card_layers(card, 1.0)}
+        for source, compositor in sources.items():
+            final = final_img.resize(compositor.size)  # same resampling as the preview's assets
+            d = card_render.pixel_diff(final, compositor.render(card, bg_path))
+            drift, worst = 0, ""
+            for name, fbox in final_layers.items():
+                pbox = ink_box(compositor.layers[name].sprite, compositor.layers[name].offset)
+                if (fbox is None) != (pbox is None):
+                    drift, worst = float("inf"), name
+                    break
+                if fbox is not None:
+                    mechs += name == "mech"
+                    e = max(abs(a*s - b) for a, b in zip(fbox, pbox))
+                    if e > drift:
+                        drift, worst = e, name
+            bad = d["mean"] > tolerance or drift > LAYER_TOLERANCE
+            failed += bad
+            print(f"{os.path.basename(path)[:32]:<32} {source:<7} {d['mean']:6.3f} {d['max']:4d} {d['changed_pct']:9.4f} {drift:9.1f}"
+                  + (f" ({worst})" if worst else "") + ("  MISMATCH" if bad else ""))
+    print(f"\n{mechs} mech layer(s) compared")
+    if not mechs:
+        print(f"no card has a mech picture and none are bundled in {card_render.MECH_PICS_DIR}; the mech layer was not checked")
+        failed += 1
+    return failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render saved card settings to print-ready TIFFs without the GUI.")
+    ap.add_argument("cards", nargs="?", default=card_render.SAVE_DIR, help="settings JSON file, directory of them, or card store (.db)")
+    ap.add_argument("-o", "--output", default=card_render.OUTPUT_DIR, help="output directory")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("--background", default=card_render.DEFAULT_BG, help="card background image")
+    ap.add_argument("--outline", choices=card_render.OUTLINE_MODES, default=None,
+                    help=f"text outline method (default: {card_render.OUTLINE_MODE})")
+    ap.add_argument("--no-cache", action="store_true", help="always re-render, bypassing the render cache")
+    ap.add_argument("--format", choices=list(card_export.COMPRESSIONS), default="tiff", help="output file format")
+    ap.add_argument("--compression", default=None,
+                    help="tiff: tiff_lzw (default), tiff_adobe_deflate, none; png: default, fast, optimize; pdf: jpeg")
+    ap.add_argument("--color", choices=card_export.COLOR_MODES, default="RGB",
+                    help="flatten to RGB (default) or CMYK, or keep the alpha channel (RGBA)")
+    ap.add_argument("--compare-outline", type=float, nargs="?", const=OUTLINE_TOLERANCE, default=None, metavar="CHANGED_PCT",
+                    help=f"render each card in every outline mode and compare with \"square\"; fails above CHANGED_PCT "
+                         f"(default {OUTLINE_TOLERANCE}) or mean {OUTLINE_MEAN_TOLERANCE}; writes nothing")
+    ap.add_argument("--check-preview", type=float, nargs="?", const=PREVIEW_TOLERANCE, default=None, metavar="TOLERANCE",
+                    help=f"compare the GUI preview with the downscaled final render (mean diff, default {PREVIEW_TOLERANCE}); writes nothing")
+    a = ap.parse_args(argv)
+    try:
+        opts = card_export.export_options(a.format, a.compression, a.color)
+    except ValueError as e:
+        ap.error(str(e))
+
+    paths = find_cards(a.cards)
+    if not paths:
+        print(f"No settings files found in {a.cards}"); return 1
+    if a.compare_outline is not None:
+        return 1 if compare_outline(paths, a.background, a.compare_outline) else 0
+    if a.check_preview is not None:
+        return 1 if check_preview(paths, a.background, a.check_preview) else 0
+    workers = max(1, min(a.workers or os.cpu_count() or 1, len(paths)))
+    t0 = time.perf_counter()
+    results = render_all(paths, a.output, workers, a.background, a.outline, not a.no_cache, opts)
+    print_summary(results, time.perf_counter() - t0, workers)
+    return 1 if any(r["error"] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Render benchmark over the bundled saved_cards and mech_pics (headless, no Tk).
+
+    python card_bench.py [-n repeats] [-o results.json] [--export "TIFF LZW"] [--compare old.json] [--threshold 1.2]
+
+Each card is rendered at PREVIEW_SCALE (layered compositor, as the GUI does), as a zoomed
+preview-sized viewport at the deepest ZOOM_LEVELS scale, and at full OUTPUT_SIZE (render_card,
+then encoded in memory with an export preset, as the exports do). The first run of each case
+starts from empty caches ("cold"); the remaining runs are averaged ("warm"). Memory is measured
+per case in a separate, untimed cold run in a fresh process: its peak RSS minus the RSS after
+imports, so Pillow's pixel buffers are included (Unix only). Results are written as JSON so two
+commits can be compared with --compare, on time and memory.
+"""
+from datetime import datetime
+from multiprocessing import get_context
+import argparse, glob, io, json, os, platform, subprocess, sys, time
+
+import PIL
+import card_export, card_render
+from card_layers import LayeredCompositor, zoom_viewport
+
+try:
+    import resource  # Unix only; peak RSS is skipped elsewhere
+except ImportError:
+    resource = None
+
+PHASES = ("background", "font", "text", "mech", "dots", "composite", "encode")
+
+def peak_rss_mb():
+    # Linux keeps ru_maxrss across fork/exec, so a child would report its parent's peak;
+    # VmHWM belongs to this process alone
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024*1024) if sys.platform == "darwin" else rss / 1024
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def bench_cards(cards_dir=card_render.SAVE_DIR):
+    return card_render.fill_missing_mechs([(os.path.basename(p), card_render.load_card(p))
+                                           for p in sorted(glob.glob(os.path.join(cards_dir, "*.json")))])
+
+def run_once(card, scale, opts=card_export.DEFAULT_EXPORT):
+    timings = {}
+    t0 = time.perf_counter()
+    if scale == "preview":
+        img = LayeredCompositor(card_render.PREVIEW_SCALE).render(card, timings=timings)
+        tp = time.perf_counter()
+        img.tobytes()  # stands in for the ImageTk.PhotoImage conversion
+    elif scale == "zoom":
+        z = card_render.ZOOM_LEVELS[-1]
+        view = zoom_viewport(z, (card_render.OUTPUT_SIZE[0]/2, card_render.OUTPUT_SIZE[1]/2),
+                             card_render.scaled_size(card_render.PREVIEW_SCALE))
+        img = LayeredCompositor(z).render(card, timings=timings, viewport=view)
+        tp = time.perf_counter()
+        img.tobytes()
+    else:
+        img = card_render.render_card(card, timings=timings)
+        tp = time.perf_counter()
+        card_export.encode(img, io.BytesIO(), opts)
+    card_render.lap(timings, "encode", tp)
+    timings["total"] = time.perf_counter() - t0
+    return timings
+
+# Untimed cold run in a fresh process, whose peak RSS then belongs to this case alone
+def _memory_run(card, scale, opts):
+    base = peak_rss_mb()
+    run_once(card, scale, opts)
+    peak = peak_rss_mb()
+    return {"rss_peak_mb": peak, "render_mb": peak - base, "asset_cache_mb": card_render.ASSETS.info()["bytes"] / (1024*1024)}
+
+def measure_memory(card, scale, opts):
+    if peak_rss_mb() is None:
+        return {}
+    with get_context("spawn").Pool(1) as pool:
+        return pool.apply(_memory_run, (card, scale, opts))
+
+def bench(cards, repeats=3, opts=card_export.DEFAULT_EXPORT):
+    results = []
+    for name, card in cards:
+        for scale in ("preview", "zoom", "full"):
+            card_render.clear_caches()
+            cold = run_once(card, scale, opts)
+            warm = [run_once(card, scale, opts) for _ in range(max(0, repeats - 1))]
+            avg = {p: sum(w.get(p, 0.0) for w in warm) / len(warm) for p in PHASES + ("total",)} if warm else {}
+            results.append(dict({"card": name, "scale": scale, "cold": cold, "warm": avg}, **measure_memory(card, scale, opts)))
+    return results
+
+def print_results(results):
+    cols = ("total",) + PHASES
+    print(f"{'card':<26} {'scale':<8} {'run':<5}" + "".join(f"{c[:9]:>10}" for c in cols) + "   (ms)")
+    for r in results:
+        for run in ("cold", "warm"):
+            if r[run]:
+                print(f"{r['card'][:26]:<26} {r['scale']:<8} {run:<5}" + "".join(f"{r[run].get(c, 0.0)*1000:10.1f}" for c in cols))
+    mem = [r for r in results if "render_mb" in r]
+    if mem:
+        print(f"\n{'card':<26} {'scale':<8} {'render MB':>10} {'peak RSS':>10} {'assets':>10}   (fresh process per case)")
+        for r in mem:
+            print(f"{r['card'][:26]:<26} {r['scale']:<8} {r['render_mb']:10.1f} {r['rss_peak_mb']:10.1f} {r['asset_cache_mb']:10.1f}")
+
+# --- Regression comparison ---
+def compare(results, old_path, threshold=1.2):
+    with open(old_path) as f:
+        old = {(r["card"], r["scale"]): r for r in json.load(f)["results"]}
+    worse = 0
+    print(f"\ncompared with {old_path} (warm total, flag if > {threshold:.2f}x)")
+    for r in results:
+        o = old.get((r["card"], r["scale"]))
+        run = "warm" if r["warm"] and o and o["warm"] else "cold"
+        if not o or not o[run].get("total"):
+            continue
+        ratio = r[run]["total"] / o[run]["total"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        worse += bool(flag)
+        mem = f"  {o['render_mb']:7.1f} -> {r['render_mb']:7.1f} MB" if "render_mb" in r and "render_mb" in o else ""
+        print(f"{r['card'][:26]:<26} {r['scale']:<8} {o[run]['total']*1000:9.1f} -> {r[run]['total']*1000:9.1f} ms  {ratio:5.2f}x{mem}{flag}")
+    return worse
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark card rendering at preview and full resolution.")
+    ap.add_argument("-n", "--repeats", type=int, default=3, help="runs per card and scale (first is cold)")
+    ap.add_argument("-o", "--output", default=None, help="results JSON (default: output/bench_<timestamp>.json)")
+    ap.add_argument("--cards", default=card_render.SAVE_DIR, help="directory of settings JSON files")
+    ap.add_argument("--export", choices=list(card_export.EXPORT_PRESETS), default=card_export.DEFAULT_PRESET,
+                    help="export preset used for the full-size encode phase")
+    ap.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    a = ap.parse_args(argv)
+
+    cards = bench_cards(a.cards)
+    if not cards:
+        print(f"No settings files found in {a.cards}"); return 1
+    results = bench(cards, a.repeats, card_export.export_options(*card_export.EXPORT_PRESETS[a.export]))
+    print_results(results)
+    out = a.output or os.path.join(card_render.OUTPUT_DIR, f"bench_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"commit": git_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+                   "python": platform.python_version(), "pillow": PIL.__version__, "platform": platform.platform(),
+                   "repeats": a.repeats, "font": card_render.resolve_font_path(),
+                   "outline_mode": card_render.OUTLINE_MODE, "export": a.export, "results": results}, f, indent=2)
+    print(f"results written to {out}")
+    if a.compare:
+        return 1 if compare(results, a.compare, a.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+from PIL import __version__ as PIL_VERSION
+import hashlib, json, os, shutil
+
+import card_render
+from card_render import ARMOR_DOT, STRUCTURE_DOT, DEFAULT_BG, DOT_KEYS, OUTPUT_DIR
+
+# --- Content-addressed render cache ---
+# An export is keyed by a hash of the normalized card settings, the bytes of every file the
+# render reads (background, dot sprites, font, mech picture) and the renderer version. The
+# cache directory holds one file per key; outputs are hard links to it where the filesystem
+# allows (copies otherwise), so re-exporting an unchanged card costs no render and no disk.
+# Entries are plain files and their mtime is the last-use time, so several batch workers can
+# share the directory without a shared index. Eviction drops least recently used files.
+# Each process keeps a running byte total (its first store scans the directory, later stores
+# add their own size) and rescans only once that total is over the cap; other processes'
+# stores are not in it, so batch runs evict once more when the whole batch is done.
+RENDER_CACHE_DIR = os.path.join(OUTPUT_DIR, ".render_cache")
+RENDER_CACHE_BYTES = 2 * 1024**3
+RENDER_CACHE_LOW_WATER = 0.9  # eviction frees down to this fraction of the cap, so a full cache is not rescanned per store
+
+_digests = {}  # (path, mtime, size) -> sha256 hex, so unchanged assets are hashed once per process
+
+def file_digest(path):
+    if not path or not os.path.isfile(path):
+        return f"missing:{path}"
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime, st.st_size)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+def normalized_settings(card):
+    card = card_render.normalize_card(card)
+    for k in card_render.text_keys(card):
+        card[k]["text"] = str(card[k].get("text", "")).upper()
+    for k in DOT_KEYS:
+        card[k]["count"] = int(card[k].get("count") or 0)
+    # The picture is identified by its content below; aspect_ratio only drives the GUI
+    card["MechImage"] = {"pos": card["MechImage"]["pos"], "size": card["MechImage"]["size"]}
+    return card
+
+def link_or_copy(src, dst):
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+class RenderCache:
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_BYTES):
+        self.cache_dir, self.max_bytes = cache_dir, max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._bytes = None  # running size of the directory, None until the first scan
+
+    def key(self, card, bg_path=DEFAULT_BG, outline_mode=None, variant="tiff"):
+        h = hashlib.sha256()
+        parts = [
+            card_render.RENDERER_VERSION, PIL_VERSION, outline_mode or card_render.OUTLINE_MODE, variant,
+            json.dumps(normalized_settings(card), sort_keys=True),
+            file_digest(bg_path), file_digest(ARMOR_DOT), file_digest(STRUCTURE_DOT),
+            file_digest(card_render.resolve_font_path()),
+            file_digest(card_render.resolve_mech_path(card.get("MechImage", {}).get("path"))),
+        ]
+        for p in parts:
+            h.update(str(p).encode()); h.update(b"\0")
+        return h.hexdigest()
+
+    def path(self, key, ext="tiff"):
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    # On a hit, make out point at the cached render and return True
+    def fetch(self, key, out, ext="tiff"):
+        src = self.path(key, ext)
+        if not os.path.isfile(src):
+            self.stats["misses"] += 1
+            return False
+        self.stats["hits"] += 1
+        os.utime(src)
+        if not (os.path.exists(out) and os.path.samefile(src, out)):
+            link_or_copy(src, out)
+        return True
+
+    # Record an output that was just written for key
+    def store(self, key, out, ext="tiff"):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        dst = self.path(key, ext)
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        link_or_copy(out, tmp)
+        os.replace(tmp, dst)
+        self.stats["stores"] += 1
+        if self._bytes is not None:
+            self._bytes += os.path.getsize(dst)
+        if self._bytes is None or self._bytes > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        out = []
+        for name in os.listdir(self.cache_dir):
+            p = os.path.join(self.cache_dir, name)
+            if not name.endswith(".tmp") and os.path.isfile(p):
+                st = os.stat(p)
+                out.append((st.st_mtime, st.st_size, p))
+        return sorted(out)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        if total <= self.max_bytes:
+            self._bytes = total
+            return
+        for _, size, p in entries:
+            if total <= self.max_bytes * RENDER_CACHE_LOW_WATER:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+        self._bytes = total
+
+    def info(self):
+        entries = self.entries()
+        return dict(self.stats, entries=len(entries), bytes=sum(e[1] for e in entries), max_bytes=self.max_bytes)
+
+RENDER_CACHE = RenderCache()
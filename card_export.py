@@ -0,0 +1,139 @@
+from PIL import Image
+import os, queue, threading, time
+
+# --- Export encoders ---
+# A rendered card is RGBA, but the background is opaque apart from a few antialiased edge
+# pixels, so exports are flattened onto white and the alpha channel dropped unless RGBA is
+# asked for. CMYK is a plain conversion (no ICC profile); use it when the print shop wants
+# CMYK files and does its own colour management. PDF pages are JPEG-compressed by Pillow.
+DPI = 300
+PDF_QUALITY = 95
+# Per format, the supported compressions; the first one is the default
+COMPRESSIONS = {
+    "tiff": ("tiff_lzw", "tiff_adobe_deflate", "none"),
+    "png": ("default", "fast", "optimize"),
+    "pdf": ("jpeg",),
+}
+COLOR_MODES = ("RGB", "CMYK", "RGBA")
+EXTENSIONS = {"tiff": "tiff", "png": "png", "pdf": "pdf"}
+PNG_LEVELS = {"default": 6, "fast": 1, "optimize": 9}
+
+EXPORT_PRESETS = {
+    "TIFF LZW": ("tiff", "tiff_lzw", "RGB"),
+    "TIFF Deflate": ("tiff", "tiff_adobe_deflate", "RGB"),
+    "TIFF LZW CMYK": ("tiff", "tiff_lzw", "CMYK"),
+    "TIFF uncompressed RGBA": ("tiff", "none", "RGBA"),
+    "PNG": ("png", "default", "RGB"),
+    "PNG optimized": ("png", "optimize", "RGB"),
+    "PDF": ("pdf", "jpeg", "RGB"),
+}
+DEFAULT_PRESET = "TIFF LZW"
+
+def export_options(fmt="tiff", compression=None, color="RGB"):
+    if fmt not in COMPRESSIONS:
+        raise ValueError(f"unknown export format: {fmt}")
+    compression = compression or COMPRESSIONS[fmt][0]
+    if compression not in COMPRESSIONS[fmt]:
+        raise ValueError(f"{fmt} export does not support compression {compression!r}")
+    if color not in COLOR_MODES or (fmt == "png" and color == "CMYK"):
+        raise ValueError(f"{fmt} export does not support colour mode {color!r}")
+    return {"format": fmt, "compression": compression, "color": color}
+
+DEFAULT_EXPORT = export_options(*EXPORT_PRESETS[DEFAULT_PRESET])
+
+def export_ext(opts):
+    return EXTENSIONS[opts["format"]]
+
+# Render cache variant: the same card exported with other options is a different file
+def export_variant(opts):
+    return f"{opts['format']}:{opts['compression']}:{opts['color']}"
+
+def flatten(img, color="RGB"):
+    if color == "RGBA" or img.mode == color:
+        return img
+    if img.mode == "RGBA":
+        flat = Image.new("RGB", img.size, "white")
+        flat.paste(img, mask=img.getchannel("A"))
+        img = flat
+    return img.convert(color)
+
+# Write an already flattened image to fp (path or file object) with opts' encoder settings
+def _write(img, fp, opts):
+    fmt, comp = opts["format"], opts["compression"]
+    if fmt == "tiff":
+        img.save(fp, format="TIFF", compression=None if comp == "none" else comp, dpi=(DPI, DPI))
+    elif fmt == "png":
+        img.save(fp, format="PNG", compress_level=PNG_LEVELS[comp], optimize=comp == "optimize", dpi=(DPI, DPI))
+    else:
+        img.save(fp, format="PDF", resolution=DPI, quality=PDF_QUALITY)
+
+# Flatten and encode exactly as save_card does, into any file object (e.g. BytesIO for benchmarks)
+def encode(img, fp, opts=DEFAULT_EXPORT):
+    _write(flatten(img, opts["color"]), fp, opts)
+
+# Encode img to out; returns size and timing. Written to a temp file and renamed into place,
+# so a reader never sees a partial file and an existing hard link into the render cache is
+# replaced rather than written through.
+def save_card(img, out, opts=DEFAULT_EXPORT):
+    t0 = time.perf_counter()
+    img = flatten(img, opts["color"])
+    t1 = time.perf_counter()
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        _write(img, tmp, opts)
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    t2 = time.perf_counter()
+    return {"out": out, "bytes": os.path.getsize(out), "flatten": t1 - t0, "encode": t2 - t1, "variant": export_variant(opts)}
+
+def format_size(n):
+    return f"{n/1024**2:.1f} MB" if n >= 1024**2 else f"{n/1024:.0f} KB"
+
+# --- Write-behind export queue ---
+# One daemon thread encodes and writes queued exports in submission order, so the GUI keeps
+# running while large files are written. on_written(result) runs on the writer thread (e.g. to
+# record the file in the render cache); completed results are collected with take_results()
+# from the caller's own thread, so no GUI calls happen here.
+class ExportWriter:
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._done = queue.Queue()
+        self.stats = {"queued": 0, "written": 0, "failed": 0, "bytes": 0, "encode_s": 0.0}
+        threading.Thread(target=self._loop, name="export-writer", daemon=True).start()
+
+    def submit(self, img, out, opts=DEFAULT_EXPORT, on_written=None):
+        self.stats["queued"] += 1
+        self._jobs.put((img, out, opts, on_written))
+
+    def pending(self):
+        return self._jobs.unfinished_tasks
+
+    def take_results(self):
+        out = []
+        while True:
+            try:
+                out.append(self._done.get_nowait())
+            except queue.Empty:
+                return out
+
+    def join(self):
+        self._jobs.join()
+
+    def _loop(self):
+        while True:
+            img, out, opts, on_written = self._jobs.get()
+            try:
+                r = save_card(img, out, opts)
+                r["error"] = ""
+                if on_written:
+                    on_written(r)
+                self.stats["written"] += 1
+                self.stats["bytes"] += r["bytes"]; self.stats["encode_s"] += r["encode"]
+            except Exception as e:
+                r = {"out": out, "bytes": 0, "flatten": 0.0, "encode": 0.0, "variant": export_variant(opts), "error": str(e)}
+                self.stats["failed"] += 1
+            self._done.put(r)
+            self._jobs.task_done()
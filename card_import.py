@@ -0,0 +1,155 @@
+"""Bulk roster import: CSV or JSON Lines rows -> saved_cards/*.json (and optionally TIFFs), no GUI.
+
+    python card_import.py roster.csv [--template saved_cards/X.json] [-o saved_cards] [--render] [-j workers]
+
+Columns (case-insensitive): model, name, MV, SZ, TMM, short, medium, long, PV, armor, structure,
+mech (file in assets/mech_pics). Layout, colours and dot geometry come from the template: the
+built-in defaults, or a saved card given with --template (its text, dots and picture are not
+used). Rows are read one at a time and each card is written as soon as it is built, so roster
+size does not affect memory.
+"""
+from multiprocessing import Pool
+import argparse, copy, csv, json, os, sys, time
+
+import card_batch, card_render
+from card_library import MECH_LIBRARY
+from card_render import DOT_KEYS, MECH_PICS_DIR
+
+# Roster column -> card key
+COLUMNS = {
+    "model": "model", "name": "name", "mv": "MV", "move": "MV", "sz": "SZ", "size": "SZ", "tmm": "TMM",
+    "short": "short", "s": "short", "medium": "medium", "med": "medium", "m": "medium", "long": "long", "l": "long",
+    "pv": "PV", "points": "PV", "armor": "Armor", "a": "Armor", "structure": "Structure", "st": "Structure",
+    "mech": "mech", "picture": "mech", "image": "mech", "pic": "mech", "mech_pic": "mech",
+}
+
+def read_rows(path, fmt=None):
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=2):  # line 1 is the header
+                yield n, row
+        else:
+            for n, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield n, json.loads(line)
+                except ValueError as e:
+                    yield n, e
+
+# Only the layout is shared: a saved card's text, dot counts and picture are cleared so a
+# roster row never inherits another mech's stats
+def load_template(path=None):
+    template = card_render.load_card(path) if path else card_render.default_card()
+    for k in card_render.text_keys(template):
+        template[k]["text"] = ""
+    for k in DOT_KEYS:
+        template[k]["count"] = 0
+    template["MechImage"]["path"] = None
+    return template
+
+def build_card(row, template):
+    card = copy.deepcopy(template)
+    for col, value in row.items():
+        key = COLUMNS.get(str(col).strip().lower())
+        if key is None or value is None:
+            continue
+        value = str(value).strip()
+        if key in DOT_KEYS:
+            card[key]["count"] = int(value or 0)
+        elif key == "mech":
+            if value:
+                path = card_render.resolve_mech_path(os.path.join(MECH_PICS_DIR, value)) or card_render.resolve_mech_path(value)
+                if not path:
+                    raise ValueError(f"mech picture not found: {value}")
+                card["MechImage"]["path"] = path
+                info = MECH_LIBRARY.info(os.path.basename(path))
+                if info and info["h"]:
+                    card["MechImage"]["aspect_ratio"] = info["aspect_ratio"]
+        else:
+            card[key]["text"] = value.upper()
+    if not card["model"]["text"] and not card["name"]["text"]:
+        raise ValueError("row has neither model nor name")
+    return card
+
+def import_roster(path, template, out_dir=card_render.SAVE_DIR, fmt=None):
+    # Yields (line number, settings path or None, error message) as rows are processed
+    os.makedirs(out_dir, exist_ok=True)
+    seen = set()
+    for n, row in read_rows(path, fmt):
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"unreadable line: {row}")
+            card = build_card(row, template)
+        except (ValueError, TypeError, AttributeError) as e:
+            yield n, None, str(e)
+            continue
+        base = card_render.card_basename(card)
+        out = os.path.join(out_dir, f"{base}.json")
+        try:
+            with open(out, "w") as f:
+                json.dump(card, f, indent=4)
+        except OSError as e:
+            yield n, None, f"could not write {base}.json: {e}"
+            continue
+        yield n, out, f"duplicate of an earlier row, overwrote {base}.json" if base in seen else ""
+        seen.add(base)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Create card settings (and optionally TIFFs) from a CSV or JSON Lines roster.")
+    ap.add_argument("roster", help="roster file (.csv, .jsonl or .ndjson)")
+    ap.add_argument("--format", choices=["csv", "jsonl"], default=None, help="override detection by extension")
+    ap.add_argument("--template", default=None, help="saved card whose layout is shared by every row")
+    ap.add_argument("-o", "--output", default=card_render.SAVE_DIR, help="directory for settings JSON files")
+    ap.add_argument("--render", action="store_true", help="also render each card to a TIFF")
+    ap.add_argument("--render-dir", default=card_render.OUTPUT_DIR, help="directory for rendered TIFFs")
+    ap.add_argument("-j", "--workers", type=int, default=1, help="render worker processes")
+    ap.add_argument("--background", default=card_render.DEFAULT_BG, help="card background image")
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    template = load_template(a.template)
+    MECH_LIBRARY.refresh()
+    written, failed, rendered = 0, 0, 0
+
+    def settings_paths():
+        nonlocal written, failed
+        for n, out, msg in import_roster(a.roster, template, a.output, a.format):
+            if out is None:
+                failed += 1
+                print(f"line {n}: skipped: {msg}")
+                continue
+            written += 1
+            if msg:
+                print(f"line {n}: {msg}")
+            yield out
+
+    if not a.render:
+        for _ in settings_paths():
+            pass
+    else:
+        jobs = ((p, a.render_dir, None, True, None) for p in settings_paths())
+        if a.workers <= 1:
+            card_batch._init_worker(a.background)
+            results = map(card_batch.render_one, jobs)
+            pool = None
+        else:
+            pool = Pool(a.workers, initializer=card_batch._init_worker, initargs=(a.background,))
+            results = pool.imap(card_batch.render_one, jobs, chunksize=4)
+        try:
+            for r in results:
+                if r["error"]:
+                    print(f"{os.path.basename(r['card'])}: render failed: {r['error']}")
+                else:
+                    rendered += 1
+        finally:
+            if pool:
+                pool.close(); pool.join()
+
+    print(f"{written} card(s) written to {a.output}" + (f", {rendered} rendered to {a.render_dir}" if a.render else "")
+          + (f", {failed} row(s) skipped" if failed else "") + f" in {time.perf_counter() - t0:.2f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+from PIL import Image
+from collections import OrderedDict
+import os, threading, time
+
+import card_render
+
+# --- Layered preview compositor ---
+# The card is split into the layers card_render.card_layers defines (one per text field, mech
+# picture, armor and structure dot strips), the same ones render_card draws. Each layer keeps a
+# small RGBA sprite plus its offset on the canvas, and is re-rendered only when its inputs
+# change. Only the boxes covered by changed layers (old and new extent) are recomposited.
+# A compositor works natively at one scale: its background and sprites are scaled once for
+# that scale, so a redraw costs preview pixels rather than output pixels. Given a viewport
+# (a box on the scaled canvas) it composites only that region, for zoomed-in inspection.
+
+class Layer:
+    def __init__(self, name):
+        self.name = name
+        self.key = None
+        self.sprite = None
+        self.offset = (0, 0)
+        self.stats = {"renders": 0, "hits": 0, "last_ms": 0.0, "total_ms": 0.0}
+
+    @property
+    def box(self):
+        if self.sprite is None:
+            return None
+        x, y = self.offset
+        return (x, y, x + self.sprite.width, y + self.sprite.height)
+
+def _intersect(box, view):
+    if box is None:
+        return None
+    x0, y0 = max(view[0], box[0]), max(view[1], box[1])
+    x1, y1 = min(view[2], box[2]), min(view[3], box[3])
+    return (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
+
+# Viewport of view_size pixels on the canvas at scale, centred on a point in output coordinates
+def zoom_viewport(scale, center, view_size):
+    cw, ch = card_render.scaled_size(scale)
+    w, h = min(view_size[0], cw), min(view_size[1], ch)
+    x = min(max(0, int(center[0]*scale - w/2)), cw - w)
+    y = min(max(0, int(center[1]*scale - h/2)), ch - h)
+    return (x, y, x + w, y + h)
+
+class LayeredCompositor:
+    # mech_source(path, size) supplies the scaled picture; defaults to the full image via the asset cache
+    def __init__(self, scale=card_render.PREVIEW_SCALE, outline_mode=None, mech_source=None):
+        self.scale = scale
+        self.outline_mode = outline_mode
+        self.mech_source = mech_source or card_render.load_mech
+        self.size = card_render.scaled_size(scale)
+        self.layers = OrderedDict()
+        self.bg_key = None
+        self.bg = None
+        self.view = None
+        self.image = None
+        self.stats = {"frames": 0, "full": 0, "last_ms": 0.0, "composite_ms": 0.0, "dirty_px": 0}
+
+    # --- Frame ---
+    def render(self, card, bg_path=card_render.DEFAULT_BG, timings=None, viewport=None):
+        t0 = time.perf_counter()
+        dirty, full = [], False
+        view = _intersect(viewport, (0, 0) + self.size) or (0, 0) + self.size
+        if view != self.view:
+            self.view, full = view, True
+
+        bg_key = (os.path.abspath(bg_path), card_render.file_mtime(bg_path), self.size)
+        if bg_key != self.bg_key:
+            self.bg_key, self.bg = bg_key, card_render.load_background(bg_path, self.size)
+            full = True
+        card_render.lap(timings, "background", t0)
+
+        order = []
+        for name, key, render in card_render.card_layers(card, self.scale, self.outline_mode, self.mech_source):
+            layer = self.layers.get(name)
+            if layer is None:
+                layer = self.layers[name] = Layer(name)
+            order.append(name)
+            if key == layer.key:
+                layer.stats["hits"] += 1
+                continue
+            old = layer.box
+            lt = time.perf_counter()
+            try:
+                layer.sprite, layer.offset = render(timings)
+            except Exception as e:
+                print(f"Layer render error ({name}):", e)
+                layer.sprite, layer.offset = None, (0, 0)
+            ms = (time.perf_counter() - lt) * 1000
+            layer.key = key
+            layer.stats["renders"] += 1; layer.stats["last_ms"] = ms; layer.stats["total_ms"] += ms
+            dirty += [old, layer.box]
+        for name in [n for n in self.layers if n not in order]:
+            dirty.append(self.layers.pop(name).box)
+        if list(self.layers) != order:  # keep layer order == draw order
+            self.layers = OrderedDict((n, self.layers[n]) for n in order)
+
+        ct = time.perf_counter()
+        if full or self.image is None:
+            self.image = Image.new("RGBA", (view[2] - view[0], view[3] - view[1]))
+            boxes = [view]
+            self.stats["full"] += 1
+        else:
+            boxes = [b for b in (_intersect(b, view) for b in dirty) if b]
+        for box in boxes:
+            self._composite(box)
+        now = card_render.lap(timings, "composite", ct)
+        self.stats["frames"] += 1
+        self.stats["composite_ms"] = (now - ct) * 1000
+        self.stats["last_ms"] = (now - t0) * 1000
+        self.stats["dirty_px"] = sum((b[2]-b[0]) * (b[3]-b[1]) for b in boxes)
+        return self.image
+
+    def _composite(self, box):
+        x0, y0, x1, y1 = box
+        tile = self.bg.crop(box)
+        for layer in self.layers.values():
+            inter = _intersect(layer.box, box)
+            if not inter:
+                continue
+            ix0, iy0, ix1, iy1 = inter
+            lx, ly = layer.offset
+            piece = layer.sprite.crop((ix0 - lx, iy0 - ly, ix1 - lx, iy1 - ly))
+            tile.alpha_composite(piece, (ix0 - x0, iy0 - y0))
+        self.image.paste(tile, (x0 - self.view[0], y0 - self.view[1]))
+
+    def invalidate(self):
+        self.layers.clear(); self.bg_key = None; self.view = None; self.image = None
+
+    def layer_stats(self):
+        return {n: dict(l.stats) for n, l in self.layers.items()}
+
+# --- Background preview worker ---
+# One daemon thread owns the compositor. submit() replaces any job that has not started yet
+# (latest wins); a render that finishes after a newer submit is dropped. The caller polls
+# take_result() from its own thread, so no GUI calls happen off the main thread.
+# Each zoom scale gets its own compositor, so switching levels keeps every level's scaled
+# background and sprites instead of rebuilding them. Compositors belong to the worker thread;
+# other threads read their layer stats through layer_stats(), a copy taken after each render.
+class PreviewWorker:
+    def __init__(self, compositor):
+        self.compositor = compositor
+        self.compositors = {compositor.scale: compositor}
+        self.profiler = None  # card_profile.SessionProfiler; each render runs through profiler.run
+        self._cond = threading.Condition()
+        self._job = None
+        self._gen = 0
+        self._running = False
+        self._result = None
+        self._layer_stats = {}  # scale -> that compositor's layer_stats() after its last render
+        self.stats = {"submitted": 0, "rendered": 0, "dropped": 0}
+        threading.Thread(target=self._loop, name="preview-worker", daemon=True).start()
+
+    def submit(self, card, bg_path, scale=None, viewport=None):
+        with self._cond:
+            self._gen += 1
+            self.stats["submitted"] += 1
+            if self._job is not None:
+                self.stats["dropped"] += 1
+            self._job = (self._gen, card, bg_path, scale or self.compositor.scale, viewport)
+            self._cond.notify()
+            return self._gen
+
+    def take_result(self):
+        with self._cond:
+            r, self._result = self._result, None
+            return r
+
+    def layer_stats(self):
+        with self._cond:
+            return {scale: dict(layers) for scale, layers in self._layer_stats.items()}
+
+    def busy(self):
+        with self._cond:
+            return self._job is not None or self._running or self._result is not None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._job is None:
+                    self._cond.wait()
+                gen, card, bg_path, scale, viewport = self._job
+                self._job = None
+                self._running = True
+            c = self.compositors.get(scale)
+            if c is None:
+                c = self.compositors[scale] = LayeredCompositor(scale, self.compositor.outline_mode, self.compositor.mech_source)
+            timings = {}
+            try:
+                render = lambda: c.render(card, bg_path, timings, viewport=viewport).copy()
+                img = self.profiler.run(render) if self.profiler else render()
+            except Exception as e:
+                print("Preview render error:", e)
+                img = None
+            layers = c.layer_stats()
+            with self._cond:
+                self._running = False
+                self._layer_stats[scale] = layers
+                if img is None:
+                    continue
+                if gen != self._gen:
+                    self.stats["dropped"] += 1
+                    continue
+                self.stats["rendered"] += 1
+                self._result = (gen, img, scale, c.view, timings)
@@ -0,0 +1,121 @@
+from PIL import Image
+import json, os, threading
+
+from card_assets import ASSETS
+from card_render import ASSETS_DIR, MECH_PICS_DIR, MECH_DEFAULTS, PREVIEW_SCALE
+
+# --- Indexed mech picture library ---
+# The index (file name, pixel size, aspect ratio, mtime, byte size, and the mtime and byte size
+# each thumbnail was built from) is persisted next to a folder of preview thumbnails. refresh()
+# only opens files that are new or changed since the last scan, and only reads their headers;
+# thumbnails are decoded from the full picture once and reused across sessions. The full-resolution picture is decoded only when something asks for a size
+# larger than the thumbnail, i.e. the final export.
+LIBRARY_DIR = os.path.join(ASSETS_DIR, ".mech_library")
+INDEX_VERSION = 1
+# Thumbnails cover the default mech box at twice the preview scale, leaving room for resizing in the GUI
+THUMB_MAX = (int(MECH_DEFAULTS["size"][0]*PREVIEW_SCALE*2), int(MECH_DEFAULTS["size"][1]*PREVIEW_SCALE*2))
+
+class MechLibrary:
+    def __init__(self, pics_dir=MECH_PICS_DIR, cache_dir=LIBRARY_DIR):
+        self.pics_dir, self.cache_dir = pics_dir, cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.thumb_dir = os.path.join(cache_dir, "thumbs")
+        self.entries = {}
+        self._lock = threading.RLock()
+        self.stats = {"scans": 0, "added": 0, "changed": 0, "removed": 0, "thumbs_built": 0, "full_res": 0}
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.entries}, f, indent=1)
+        os.replace(tmp, self.index_path)
+
+    # Scan the folder; returns True if the set of pictures or any of them changed
+    def refresh(self):
+        with self._lock:
+            self.stats["scans"] += 1
+            try:
+                found = {e.name: e.stat() for e in os.scandir(self.pics_dir)
+                         if e.is_file() and e.name.lower().endswith(".png")}
+            except FileNotFoundError:
+                os.makedirs(self.pics_dir, exist_ok=True)
+                found = {}
+            changed = False
+            for name in [n for n in self.entries if n not in found]:
+                del self.entries[name]
+                self.stats["removed"] += 1; changed = True
+            for name, st in found.items():
+                e = self.entries.get(name)
+                if e and e["mtime"] == st.st_mtime and e["bytes"] == st.st_size:
+                    continue
+                try:
+                    with Image.open(os.path.join(self.pics_dir, name)) as im:  # header only, no decode
+                        w, h = im.size
+                except OSError:
+                    continue
+                self.stats["changed" if e else "added"] += 1; changed = True
+                self.entries[name] = {"w": w, "h": h, "aspect_ratio": w / h if h else 0,
+                                      "mtime": st.st_mtime, "bytes": st.st_size}
+            if changed:
+                self._save_index()
+            return changed
+
+    def names(self):
+        with self._lock:
+            return sorted(self.entries, key=str.lower)
+
+    def info(self, name):
+        with self._lock:
+            return self.entries.get(name)
+
+    def path(self, name):
+        return os.path.join(self.pics_dir, name)
+
+    def thumbnail_path(self, name):
+        e = self.info(name)
+        if not e:
+            return None
+        thumb = os.path.join(self.thumb_dir, name)
+        # Rebuilt whenever the picture differs from the one it was made from; comparing
+        # mtimes alone misses a replacement that kept an older mtime (cp -p, Explorer copies)
+        source = [e["mtime"], e["bytes"]]
+        if not os.path.exists(thumb) or e.get("thumb") != source:
+            os.makedirs(self.thumb_dir, exist_ok=True)
+            im = Image.open(self.path(name)).convert("RGBA")
+            im.thumbnail(THUMB_MAX)
+            tmp = f"{thumb}.{threading.get_ident()}.tmp"
+            im.save(tmp, format="PNG")
+            os.replace(tmp, thumb)
+            with self._lock:
+                e["thumb"] = source
+                self._save_index()
+            self.stats["thumbs_built"] += 1
+        return thumb
+
+    # Scaled picture for path at size: from the thumbnail when it is large enough, else the full image
+    def scaled(self, path, size):
+        name = os.path.basename(path.replace("\\", "/")) if path else None
+        e = self.info(name) if name else None
+        if e is None:
+            return None
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        thumb = self.thumbnail_path(name)
+        with Image.open(thumb) as im:
+            tw, th = im.size
+        if size[0] <= tw and size[1] <= th:
+            return ASSETS.get(thumb, size)
+        self.stats["full_res"] += 1
+        return ASSETS.get(self.path(name), size)
+
+MECH_LIBRARY = MechLibrary()
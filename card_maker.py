@@ -1,74 +1,46 @@
-from PIL import Image, ImageDraw, ImageFont, ImageTk
+from PIL import ImageTk
 import tkinter as tk
 from tkinter import filedialog, colorchooser, messagebox, Spinbox
 from datetime import datetime
-import os, json
+import os, json, copy, sys, time
+
+from card_assets import ASSETS
+from card_cache import RENDER_CACHE
+from card_export import (EXPORT_PRESETS, DEFAULT_PRESET, ExportWriter, export_ext, export_options, export_variant,
+                         format_size)
+from card_library import MECH_LIBRARY
+from card_profile import PREVIEW_PHASES, PROFILER, FrameStats, format_frame, hit_rate
+from card_layers import LayeredCompositor, PreviewWorker, zoom_viewport
+from card_render import (OUTPUT_SIZE, PREVIEW_SCALE, ZOOM_LEVELS, DEFAULT_BG, SAVE_DIR, OUTPUT_DIR,
+                         TEXT_DEFAULTS, MECH_DEFAULTS, resolve_font_path, load_mech, read_settings, render_card, scaled_size,
+                         font_cache_info, dot_strip_info)
 
 # --- Constants ---
-OUTPUT_SIZE = (2100, 1500)  # 7×5 in @300 DPI
-PREVIEW_SCALE = 0.3
-DEFAULT_BG = os.path.join("assets", "Battletech Card Blank 11-1-25 v1.png")
-SAVE_DIR = "saved_cards"
-ASSETS_DIR = "assets"
-ARMOR_DOT = os.path.join(ASSETS_DIR, "armor_dot.png")
-STRUCTURE_DOT = os.path.join(ASSETS_DIR, "structure_dot.png")
-MECH_PICS_DIR = os.path.join(ASSETS_DIR, "mech_pics")
 NUDGE_STEP = 5
 
-bg_image = preview_image = photo_preview = mech_image = None
-
-# --- Defaults (from your screenshot) ---
-TEXT_ELEMENTS = {
-    "model":  {"pos":[80,40],"size":120,"fill":"#efe31c","outline":"#930000","outline_width":6,"text":""},
-    "name":   {"pos":[80,145],"size":180,"fill":"#930000","outline":"#efe31c","outline_width":6,"text":""},
-    "MV":     {"pos":[1020,480],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
-    "SZ":     {"pos":[260,480],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
-    "TMM":    {"pos":[670,480],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
-    "short":  {"pos":[305,740],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
-    "medium": {"pos":[625,740],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
-    "long":   {"pos":[950,740],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
-    "PV":     {"pos":[1785,10],"size":140,"fill":"#930000","outline":"#efe31c","outline_width":4,"text":""},
-    "Armor":     {"count":0,"pos":[180,945],"size":60,"spacing":61,"per_row":13,"row_gap":5},
-    "Structure": {"count":0,"pos":[180,1095],"size":60,"spacing":61,"per_row":13,"row_gap":5},
-}
+bg_image = bg_path = preview_image = photo_preview = mech_image = None
 
-MECH_IMAGE = {
-    "path": None,
-    "pos": [1280, 110],     # X, Y
-    "size": [666, 888],     # Width, Height
-    "aspect_ratio": 666 / 888,
-}
+# --- Working state (defaults live in card_render) ---
+TEXT_ELEMENTS = copy.deepcopy(TEXT_DEFAULTS)
+MECH_IMAGE = copy.deepcopy(MECH_DEFAULTS)
 
 # --- State maps ---
 pos_entries, size_vars, outline_vars, fill_vars, outline_color_vars = {}, {}, {}, {}, {}
 dot_pos_entries, dot_size_vars, dot_spacing_vars, dot_per_row_vars, dot_row_gap_vars = {}, {}, {}, {}, {}
 mech_pos_entries, mech_size_vars = {}, {}
 
-# --- Font loader ---
-def load_font(size):
-    candidates = [
-        os.path.join("fonts", "Steiner.otf"),
-        r"C:\\Users\\Jonathan\\AppData\\Local\\Microsoft\\Windows\\Fonts\\STEINER.OTF",
-        "arialbd.ttf",
-    ]
-    for p in candidates:
-        try:
-            return ImageFont.truetype(p, size)
-        except Exception:
-            continue
-    return ImageFont.load_default()
-
 # --- Load background image ---
 def load_background(p=None):
-    global bg_image
+    global bg_image, bg_path
     path = p if p and os.path.exists(p) else filedialog.askopenfilename(
         title="Select Background",
         filetypes=[("Images","*.png;*.jpg;*.jpeg;*.tif;*.tiff")]
     )
     if not path:
         return
-    bg_image = Image.open(path).convert("RGBA").resize(OUTPUT_SIZE)
-    draw_preview()
+    bg_path = path
+    bg_image = ASSETS.get(path, OUTPUT_SIZE)
+    request_preview()
 
 # --- Load mech image file ---
 def load_mech_image(name):
@@ -76,72 +48,178 @@ def load_mech_image(name):
     if not name or name == "None":
         mech_image = None
         MECH_IMAGE["path"] = None
-        draw_preview()
+        request_preview()
         return
-    path = os.path.join(MECH_PICS_DIR, name)
-    if os.path.exists(path):
-        mech_image = Image.open(path).convert("RGBA")
-        MECH_IMAGE["path"] = path
-        if mech_image.height != 0:
-            MECH_IMAGE["aspect_ratio"] = mech_image.width / mech_image.height
-        draw_preview()
-
-# --- Preview render ---
+    # Only the library index is consulted here; the picture is decoded lazily (thumbnail for the preview)
+    info = MECH_LIBRARY.info(name) or (MECH_LIBRARY.refresh() and MECH_LIBRARY.info(name))
+    if info:
+        mech_image = info
+        MECH_IMAGE["path"] = MECH_LIBRARY.path(name)
+        if info["h"] != 0:
+            MECH_IMAGE["aspect_ratio"] = info["aspect_ratio"]
+        request_preview()
+
+# --- Preview render (layered compositor on a worker thread; only the PhotoImage swap runs here) ---
+PREVIEW_POLL_MS = 16
+def preview_mech(path, size):
+    return MECH_LIBRARY.scaled(path, size) or load_mech(path, size)
+
+preview_worker = PreviewWorker(LayeredCompositor(PREVIEW_SCALE, mech_source=preview_mech))
+_preview_poll = None
+
+def preview_card():
+    card = copy.deepcopy(TEXT_ELEMENTS)
+    for key, var in vars_map.items():
+        if key in ("Armor","Structure"):
+            try:
+                card[key]["count"] = int(var.get() or 0)
+            except ValueError:
+                pass
+        else:
+            TEXT_ELEMENTS[key]["text"] = card[key]["text"] = var.get().upper()
+    card["MechImage"] = copy.deepcopy(MECH_IMAGE)
+    if not mech_image:
+        card["MechImage"]["path"] = None
+    return card
+
 def draw_preview():
-    global preview_image, photo_preview
+    global _preview_poll
     if not bg_image:
         return
-
-    img = bg_image.copy().resize((int(OUTPUT_SIZE[0]*PREVIEW_SCALE), int(OUTPUT_SIZE[1]*PREVIEW_SCALE)))
-    draw = ImageDraw.Draw(img)
-    scale = PREVIEW_SCALE
-
-    # Text elements
-    for key, var in vars_map.items():
-        if key in ("Armor","Structure"):  # skip dot counters
-            continue
-        t = var.get().upper()
-        TEXT_ELEMENTS[key]["text"] = t
-        d = TEXT_ELEMENTS[key]
-        pos = (d["pos"][0]*scale, d["pos"][1]*scale)
-        f = load_font(int(d["size"]*scale))
-        ow = max(1, int(d["outline_width"]*scale))
-        o = d["outline"]
-        if o:
-            for dx in range(-ow, ow+1):
-                for dy in range(-ow, ow+1):
-                    if dx or dy:
-                        draw.text((pos[0]+dx, pos[1]+dy), t, font=f, fill=o)
-        draw.text(pos, t, fill=d["fill"], font=f)
-    
-    # Mech image
-    if mech_image:
-        mech_scaled = mech_image.resize((int(MECH_IMAGE["size"][0]*scale), int(MECH_IMAGE["size"][1]*scale)))
-        img.paste(mech_scaled, (int(MECH_IMAGE["pos"][0]*scale), int(MECH_IMAGE["pos"][1]*scale)), mech_scaled)
-
-    # Armor/Structure dots with wrapping
-    try:
-        armor, struct = Image.open(ARMOR_DOT).convert("RGBA"), Image.open(STRUCTURE_DOT).convert("RGBA")
-        for label, imgdot in [("Armor", armor), ("Structure", struct)]:
-            d = TEXT_ELEMENTS[label]
-            c = int(vars_map[label].get() or 0)
-            s = int(d["size"])
-            scaled = imgdot.resize((int(s*scale), int(s*scale)))
-            per_row = int(d.get("per_row", 13))
-            row_gap = int(d.get("row_gap", 5))
-            for i in range(c):
-                row = i // per_row
-                col = i % per_row
-                x = int((d["pos"][0] + col * d["spacing"]) * scale)
-                y = int((d["pos"][1] + row * (d["size"] + row_gap)) * scale)
-                img.paste(scaled, (x, y), scaled)
-    except Exception as e:
-        print("Dot render error:", e)
-
-    preview_image = img
-    photo_preview = ImageTk.PhotoImage(img)
-    preview_label.config(image=photo_preview)
-    preview_label.image = photo_preview
+    scale = ZOOM_LEVELS[zoom["level"]]
+    viewport = zoom_viewport(scale, zoom["center"], PREVIEW_SIZE) if zoom["level"] else None
+    preview_worker.submit(preview_card(), bg_path, scale, viewport)
+    if _preview_poll is None:
+        _preview_poll = root.after(PREVIEW_POLL_MS, poll_preview)
+
+def poll_preview():
+    global _preview_poll, preview_image, photo_preview
+    _preview_poll = None
+    result = preview_worker.take_result()
+    if result:
+        _, preview_image, zoom["scale"], zoom["view"], timings = result
+        tp = time.perf_counter()
+        photo_preview = ImageTk.PhotoImage(preview_image)
+        preview_label.config(image=photo_preview)
+        preview_label.image = photo_preview
+        timings["photo"] = time.perf_counter() - tp
+        timings["total"] = sum(timings.get(p, 0.0) for p in PREVIEW_PHASES)
+        frame_stats.add(timings)
+        if profiling.get():
+            update_profile_overlay()
+    if preview_worker.busy():
+        _preview_poll = root.after(PREVIEW_POLL_MS, poll_preview)
+
+draw_preview, poll_preview = PROFILER.wrap(draw_preview), PROFILER.wrap(poll_preview)
+
+# --- Profiling overlay (frame timings and cache hit rates under the status line) ---
+PROFILE_REFRESH_MS = 500
+frame_stats = FrameStats()
+_profile_refresh = None
+
+def update_profile_overlay():
+    fonts, assets, strips = font_cache_info(), ASSETS.info(), dot_strip_info()["strip"]
+    layers = [l for c in preview_worker.layer_stats().values() for l in c.values()]
+    sched, worker, rc = preview_scheduler.stats, preview_worker.stats, RENDER_CACHE.stats
+    profile_label.config(text=format_frame(frame_stats) + "\n" +
+        f"hit rates: font {hit_rate(fonts['hits'], fonts['misses'])}, assets {hit_rate(assets['hits'], assets['misses'])}, "
+        f"dot strips {hit_rate(strips['hits'], strips['misses'])}, "
+        f"layers {hit_rate(sum(l['hits'] for l in layers), sum(l['renders'] for l in layers))}, "
+        f"export cache {hit_rate(rc['hits'], rc['misses'])} | "
+        f"redraw requests {sched['requests']} ({sched['collapsed']} coalesced), frames dropped {worker['dropped']}")
+
+def refresh_profile_overlay():
+    global _profile_refresh
+    _profile_refresh = None
+    if profiling.get():
+        update_profile_overlay()
+        _profile_refresh = root.after(PROFILE_REFRESH_MS, refresh_profile_overlay)
+
+def toggle_profiling():
+    if profiling.get():
+        PROFILER.start(); preview_worker.profiler = PROFILER
+        profile_label.pack(after=status_label, pady=(0, 3))
+        if _profile_refresh is None:
+            refresh_profile_overlay()
+    else:
+        PROFILER.stop(); preview_worker.profiler = None
+        profile_label.pack_forget()
+
+def dump_profile():
+    if not PROFILER.has_data():
+        status_label.config(text="No profile data yet; tick Profile and use the editor first"); return
+    file = filedialog.asksaveasfilename(title="Save Profile", defaultextension=".prof", initialdir=OUTPUT_DIR,
+        initialfile=f"profile_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.prof",
+        filetypes=[("cProfile stats (snakeviz, flameprof, gprof2dot)","*.prof"),("Text report","*.txt")])
+    if file:
+        status_label.config(text=f"Profile written to {PROFILER.dump(file)}")
+
+# --- Zoom / pan (wheel zooms about the pointer, drag pans; zoomed levels render only the viewport) ---
+PREVIEW_SIZE = scaled_size(PREVIEW_SCALE)
+zoom = {"level": 0, "center": [OUTPUT_SIZE[0]/2, OUTPUT_SIZE[1]/2], "scale": PREVIEW_SCALE,
+        "view": (0, 0) + PREVIEW_SIZE, "drag": None}
+
+# Pointer position on the preview label -> output coordinates of the card pixel under it
+def preview_point(event):
+    vx0, vy0, vx1, vy1 = zoom["view"]
+    ix = event.x - (preview_label.winfo_width() - (vx1 - vx0)) / 2
+    iy = event.y - (preview_label.winfo_height() - (vy1 - vy0)) / 2
+    return (vx0 + ix) / zoom["scale"], (vy0 + iy) / zoom["scale"], ix, iy
+
+# Clamped to the card, so panning past an edge doesn't build up an offset that has to be dragged back
+def set_zoom_center(scale, cx, cy):
+    x0, y0, x1, y1 = zoom_viewport(scale, (cx, cy), PREVIEW_SIZE)
+    zoom["center"] = [(x0 + x1) / 2 / scale, (y0 + y1) / 2 / scale]
+
+def on_preview_wheel(event):
+    step = 1 if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0 else -1
+    level = min(max(0, zoom["level"] + step), len(ZOOM_LEVELS) - 1)
+    if level == zoom["level"]:
+        return
+    px, py, ix, iy = preview_point(event)
+    scale = ZOOM_LEVELS[level]
+    # Keep the card point under the pointer where it is
+    zoom["level"] = level
+    set_zoom_center(scale, px + (PREVIEW_SIZE[0]/2 - ix) / scale, py + (PREVIEW_SIZE[1]/2 - iy) / scale)
+    zoom_label.config(text=f"Zoom {ZOOM_LEVELS[level] / PREVIEW_SCALE:.0%}")
+    request_preview()
+
+def on_preview_press(event):
+    zoom["drag"] = (event.x, event.y, list(zoom["center"]))
+
+def on_preview_drag(event):
+    if not zoom["drag"] or not zoom["level"]:
+        return
+    x, y, (cx, cy) = zoom["drag"]
+    scale = ZOOM_LEVELS[zoom["level"]]
+    set_zoom_center(scale, cx - (event.x - x) / scale, cy - (event.y - y) / scale)
+    request_preview()
+
+# --- Redraw scheduler ---
+# Var traces fire once per keystroke and load_settings sets dozens of vars in a row; requests
+# are coalesced into a single draw_preview per frame via root.after.
+REDRAW_DELAY_MS = 16
+
+class RedrawScheduler:
+    def __init__(self, widget, callback, delay_ms=REDRAW_DELAY_MS):
+        self.widget, self.callback, self.delay_ms = widget, callback, delay_ms
+        self._pending = None
+        self.stats = {"requests": 0, "renders": 0, "collapsed": 0}
+
+    def request(self, *_):
+        self.stats["requests"] += 1
+        if self._pending is not None:
+            self.stats["collapsed"] += 1
+            return
+        self._pending = self.widget.after(self.delay_ms, self._run)
+
+    def _run(self):
+        self._pending = None
+        self.stats["renders"] += 1
+        self.callback()
+
+def request_preview(*_):
+    preview_scheduler.request()
 
 # --- Aspect ratio helpers for mech image ---
 def update_mech_width(var):
@@ -151,7 +229,7 @@ def update_mech_width(var):
             MECH_IMAGE["size"][1] = int(w / MECH_IMAGE["aspect_ratio"])
             mech_size_vars["h"].set(str(MECH_IMAGE["size"][1]))
         MECH_IMAGE["size"][0] = w
-        draw_preview()
+        request_preview()
     except ValueError:
         pass
 
@@ -162,7 +240,7 @@ def update_mech_height(var):
             MECH_IMAGE["size"][0] = int(h * MECH_IMAGE["aspect_ratio"])
             mech_size_vars["w"].set(str(MECH_IMAGE["size"][0]))
         MECH_IMAGE["size"][1] = h
-        draw_preview()
+        request_preview()
     except ValueError:
         pass
 
@@ -172,21 +250,21 @@ def nudge_text(k, dx, dy):
     TEXT_ELEMENTS[k]["pos"][1] += dy
     pos_entries[k]["x"].set(str(TEXT_ELEMENTS[k]["pos"][0]))
     pos_entries[k]["y"].set(str(TEXT_ELEMENTS[k]["pos"][1]))
-    draw_preview()
+    request_preview()
 
 def nudge_dots(k, dx, dy):
     TEXT_ELEMENTS[k]["pos"][0] += dx
     TEXT_ELEMENTS[k]["pos"][1] += dy
     dot_pos_entries[k]["x"].set(str(TEXT_ELEMENTS[k]["pos"][0]))
     dot_pos_entries[k]["y"].set(str(TEXT_ELEMENTS[k]["pos"][1]))
-    draw_preview()
+    request_preview()
 
 def nudge_mech(dx, dy):
     MECH_IMAGE["pos"][0] += dx
     MECH_IMAGE["pos"][1] += dy
     mech_pos_entries["x"].set(str(MECH_IMAGE["pos"][0]))
     mech_pos_entries["y"].set(str(MECH_IMAGE["pos"][1]))
-    draw_preview()
+    request_preview()
 
 def toggle_section(frame, var):
     if var.get():
@@ -197,6 +275,7 @@ def toggle_section(frame, var):
 # --- GUI ---
 root = tk.Tk()
 root.title("Battletech Card Generator")
+preview_scheduler = RedrawScheduler(root, draw_preview)
 
 # UI state (must be after root)
 keep_aspect_ratio = tk.BooleanVar(value=True)
@@ -228,25 +307,30 @@ for i, lbl in enumerate(keys):
     tk.Label(f, text=display_labels.get(lbl,lbl), width=8).pack(side=tk.LEFT)
     var = vars_map[lbl]
     if lbl in ("Armor","Structure") or lbl in numeric_fields:
-        spin = Spinbox(f, from_=0, to=50, width=5, textvariable=var, command=draw_preview)
+        spin = Spinbox(f, from_=0, to=50, width=5, textvariable=var, command=request_preview)
         spin.pack(side=tk.LEFT)
     else:
         e = tk.Entry(f, textvariable=var, width=14); e.pack(side=tk.LEFT)
     var.set(str(TEXT_ELEMENTS[lbl].get("text","")) if lbl not in ("Armor","Structure") else str(TEXT_ELEMENTS[lbl]["count"]))
-    var.trace_add("write", lambda *_,: draw_preview())
+    var.trace_add("write", lambda *_,: request_preview())
 
 # --- Mech Image selector in Stats ---
 tk.Label(left, text="\nMech Image", font=("Arial",10,"bold")).pack(anchor="w", pady=(8,2))
-mech_files = []
-try:
-    mech_files = [f for f in os.listdir(MECH_PICS_DIR) if f.lower().endswith(".png")]
-except FileNotFoundError:
-    os.makedirs(MECH_PICS_DIR, exist_ok=True)
-mech_files.insert(0, "None")
+MECH_LIBRARY.refresh()
 selected_mech = tk.StringVar(value="None")
 f_mech_select = tk.Frame(left); f_mech_select.pack(anchor="w", pady=3)
 tk.Label(f_mech_select, text="Select:").pack(side=tk.LEFT)
-tk.OptionMenu(f_mech_select, selected_mech, *mech_files, command=load_mech_image).pack(side=tk.LEFT)
+mech_menu = tk.OptionMenu(f_mech_select, selected_mech, "None", *MECH_LIBRARY.names(), command=load_mech_image)
+mech_menu.pack(side=tk.LEFT)
+
+# Rescan mech_pics each time the menu opens so new pictures show up without a restart
+def refresh_mech_menu():
+    if not MECH_LIBRARY.refresh():
+        return
+    menu = mech_menu["menu"]; menu.delete(0, "end")
+    for name in ["None"] + MECH_LIBRARY.names():
+        menu.add_command(label=name, command=lambda n=name: (selected_mech.set(n), load_mech_image(n)))
+mech_menu["menu"].configure(postcommand=refresh_mech_menu)
 
 # --- Text Appearance (collapsible) ---
 header_text_frame = tk.Frame(left); header_text_frame.pack(anchor="w", pady=(8,2))
@@ -264,28 +348,28 @@ for k in [x for x in TEXT_ELEMENTS if x not in ("Armor","Structure")]:
     tk.Label(f, text="Y:").pack(side=tk.LEFT)
     yv = tk.StringVar(value=str(d["pos"][1])); tk.Entry(f, textvariable=yv, width=5).pack(side=tk.LEFT)
     pos_entries[k] = {"x": xv, "y": yv}
-    xv.trace_add("write", lambda *_, key=k, v=xv: (TEXT_ELEMENTS[key]["pos"].__setitem__(0, int(v.get() or 0)), draw_preview()))
-    yv.trace_add("write", lambda *_, key=k, v=yv: (TEXT_ELEMENTS[key]["pos"].__setitem__(1, int(v.get() or 0)), draw_preview()))
+    xv.trace_add("write", lambda *_, key=k, v=xv: (TEXT_ELEMENTS[key]["pos"].__setitem__(0, int(v.get() or 0)), request_preview()))
+    yv.trace_add("write", lambda *_, key=k, v=yv: (TEXT_ELEMENTS[key]["pos"].__setitem__(1, int(v.get() or 0)), request_preview()))
     tk.Label(f, text="Size:").pack(side=tk.LEFT)
     sv = tk.StringVar(value=str(d["size"])); tk.Entry(f, textvariable=sv, width=4).pack(side=tk.LEFT)
     size_vars[k] = sv
-    sv.trace_add("write", lambda *_, key=k, v=sv: (TEXT_ELEMENTS[key].__setitem__("size", int(v.get() or 0)), draw_preview()))
+    sv.trace_add("write", lambda *_, key=k, v=sv: (TEXT_ELEMENTS[key].__setitem__("size", int(v.get() or 0)), request_preview()))
     tk.Label(f, text="O:").pack(side=tk.LEFT)
     ow = tk.StringVar(value=str(d["outline_width"])); tk.Entry(f, textvariable=ow, width=4).pack(side=tk.LEFT)
     outline_vars[k] = ow
-    ow.trace_add("write", lambda *_, key=k, v=ow: (TEXT_ELEMENTS[key].__setitem__("outline_width", int(v.get() or 0)), draw_preview()))
+    ow.trace_add("write", lambda *_, key=k, v=ow: (TEXT_ELEMENTS[key].__setitem__("outline_width", int(v.get() or 0)), request_preview()))
     tk.Label(f, text="Fill:").pack(side=tk.LEFT)
     fc = tk.StringVar(value=d["fill"]); ef = tk.Entry(f, textvariable=fc, width=8); ef.pack(side=tk.LEFT)
     tk.Button(f, text="🎨", command=lambda key=k, v=fc: (v.set(colorchooser.askcolor()[1] or v.get()),
-            TEXT_ELEMENTS[key].__setitem__("fill", v.get()), draw_preview())).pack(side=tk.LEFT)
+            TEXT_ELEMENTS[key].__setitem__("fill", v.get()), request_preview())).pack(side=tk.LEFT)
     fill_vars[k] = fc
-    fc.trace_add("write", lambda *_, key=k, v=fc: (TEXT_ELEMENTS[key].__setitem__("fill", v.get()), draw_preview()))
+    fc.trace_add("write", lambda *_, key=k, v=fc: (TEXT_ELEMENTS[key].__setitem__("fill", v.get()), request_preview()))
     tk.Label(f, text="Out:").pack(side=tk.LEFT)
     oc = tk.StringVar(value=d["outline"]); eo = tk.Entry(f, textvariable=oc, width=8); eo.pack(side=tk.LEFT)
     tk.Button(f, text="🎨", command=lambda key=k, v=oc: (v.set(colorchooser.askcolor()[1] or v.get()),
-            TEXT_ELEMENTS[key].__setitem__("outline", v.get()), draw_preview())).pack(side=tk.LEFT)
+            TEXT_ELEMENTS[key].__setitem__("outline", v.get()), request_preview())).pack(side=tk.LEFT)
     outline_color_vars[k] = oc
-    oc.trace_add("write", lambda *_, key=k, v=oc: (TEXT_ELEMENTS[key].__setitem__("outline", v.get()), draw_preview()))
+    oc.trace_add("write", lambda *_, key=k, v=oc: (TEXT_ELEMENTS[key].__setitem__("outline", v.get()), request_preview()))
 
 # --- Armor / Structure Appearance (collapsible) ---
 header_armor_frame = tk.Frame(left); header_armor_frame.pack(anchor="w", pady=(8,2))
@@ -321,7 +405,7 @@ for k in ("Armor","Structure"):
                 TEXT_ELEMENTS[key]["pos"][1] = int(var.get() or 0)
             else:
                 TEXT_ELEMENTS[key][f] = int(var.get() or 0)
-            draw_preview()
+            request_preview()
         v.trace_add("write", _trace)
 
 # --- Mech Image Appearance (collapsible) ---
@@ -342,8 +426,8 @@ xv = tk.StringVar(value=str(MECH_IMAGE["pos"][0])); tk.Entry(f, textvariable=xv,
 tk.Label(f, text="Y:").pack(side=tk.LEFT)
 yv = tk.StringVar(value=str(MECH_IMAGE["pos"][1])); tk.Entry(f, textvariable=yv, width=5).pack(side=tk.LEFT)
 mech_pos_entries = {"x": xv, "y": yv}
-xv.trace_add("write", lambda *_, v=xv: (MECH_IMAGE["pos"].__setitem__(0, int(v.get() or 0)), draw_preview()))
-yv.trace_add("write", lambda *_, v=yv: (MECH_IMAGE["pos"].__setitem__(1, int(v.get() or 0)), draw_preview()))
+xv.trace_add("write", lambda *_, v=xv: (MECH_IMAGE["pos"].__setitem__(0, int(v.get() or 0)), request_preview()))
+yv.trace_add("write", lambda *_, v=yv: (MECH_IMAGE["pos"].__setitem__(1, int(v.get() or 0)), request_preview()))
 
 tk.Label(f, text="W:").pack(side=tk.LEFT)
 wv = tk.StringVar(value=str(MECH_IMAGE["size"][0])); tk.Entry(f, textvariable=wv, width=5).pack(side=tk.LEFT)
@@ -358,38 +442,57 @@ hv.trace_add("write", lambda *_, v=hv: update_mech_height(v))
 # --- Right side preview ---
 right = tk.Frame(main); right.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 preview_label = tk.Label(right, bg="#222"); preview_label.pack(fill=tk.BOTH, expand=True)
+zoom_label = tk.Label(right, text="Zoom 100%", fg="#888"); zoom_label.pack(anchor="e")
+preview_label.bind("<MouseWheel>", on_preview_wheel)
+preview_label.bind("<Button-4>", on_preview_wheel)
+preview_label.bind("<Button-5>", on_preview_wheel)
+preview_label.bind("<ButtonPress-1>", on_preview_press)
+preview_label.bind("<B1-Motion>", on_preview_drag)
 
 # --- Bottom buttons ---
 bottom = tk.Frame(root); bottom.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
 tk.Button(bottom, text="Load Background", command=lambda: load_background(DEFAULT_BG)).pack(side=tk.LEFT, padx=10)
 tk.Button(bottom, text="Save Settings", command=lambda: save_settings()).pack(side=tk.LEFT, padx=10)
 tk.Button(bottom, text="Load Settings", command=lambda: load_settings()).pack(side=tk.LEFT, padx=10)
-tk.Button(bottom, text="Save Final TIFF", command=lambda: save_final()).pack(side=tk.LEFT, padx=10)
+tk.Button(bottom, text="Save Final", command=lambda: save_final()).pack(side=tk.LEFT, padx=(10, 2))
+export_preset = tk.StringVar(value=DEFAULT_PRESET)
+tk.OptionMenu(bottom, export_preset, *EXPORT_PRESETS).pack(side=tk.LEFT)
+tk.Button(bottom, text="Dump Profile", command=lambda: dump_profile()).pack(side=tk.RIGHT, padx=10)
+profiling = tk.BooleanVar(value="--profile" in sys.argv[1:])
+tk.Checkbutton(bottom, text="Profile", variable=profiling, command=lambda: toggle_profiling()).pack(side=tk.RIGHT)
 
 status_label = tk.Label(root, text=""); status_label.pack(pady=3)
+profile_label = tk.Label(root, text="", font=("Courier", 9), justify=tk.LEFT)
 
 # --- Save/Load & Export (unchanged logic) ---
-def save_settings():
-    os.makedirs(SAVE_DIR, exist_ok=True)
-    model = vars_map["model"].get().strip().upper() or "UNTITLED"
-    name  = vars_map["name"].get().strip().upper() or "CARD"
-    path  = os.path.join(SAVE_DIR, f"{model}_{name}.json")
+def sync_from_vars():
     for k in TEXT_ELEMENTS:
         if k in vars_map:
             if k not in ("Armor","Structure"):
                 TEXT_ELEMENTS[k]["text"] = vars_map[k].get().upper()
             else:
                 TEXT_ELEMENTS[k]["count"] = int(vars_map[k].get() or 0)
-    TEXT_ELEMENTS["MechImage"] = MECH_IMAGE
+
+def current_card():
+    sync_from_vars()
+    card = copy.deepcopy(TEXT_ELEMENTS)
+    card["MechImage"] = copy.deepcopy(MECH_IMAGE)
+    return card
+
+def save_settings():
+    os.makedirs(SAVE_DIR, exist_ok=True)
+    model = vars_map["model"].get().strip().upper() or "UNTITLED"
+    name  = vars_map["name"].get().strip().upper() or "CARD"
+    path  = os.path.join(SAVE_DIR, f"{model}_{name}.json")
     with open(path, "w") as f:
-        json.dump(TEXT_ELEMENTS, f, indent=4)
+        json.dump(current_card(), f, indent=4)
     messagebox.showinfo("Settings Saved", f"Saved to:\n{path}")
 
 def load_settings():
     file = filedialog.askopenfilename(title="Load Settings", filetypes=[("JSON Files","*.json")], initialdir=SAVE_DIR)
     if not file: return
     try:
-        with open(file) as f: data = json.load(f)
+        data = read_settings(file)  # full settings, or a template + overrides delta
         if "title" in data and "model" not in data:
             data["model"] = data.pop("title")
         for k,v in data.items():
@@ -401,41 +504,59 @@ def load_settings():
         if "MechImage" in data:
             MECH_IMAGE.update(data["MechImage"])
             if MECH_IMAGE["path"]:
-                mech_name = os.path.basename(MECH_IMAGE["path"])
-                load_mech_image(mech_name)
-        refresh_appearance_entries(); refresh_dot_entries(); refresh_mech_entries(); draw_preview()
+                mech_name = os.path.basename(MECH_IMAGE["path"].replace("\\", "/"))
+                selected_mech.set(mech_name); load_mech_image(mech_name)
+        refresh_appearance_entries(); refresh_dot_entries(); refresh_mech_entries(); request_preview()
         messagebox.showinfo("Loaded", f"Loaded: {os.path.basename(file)}")
     except Exception as e:
         messagebox.showerror("Load Failed", str(e))
 
+# Rendering stays here (it reads the working state); encoding and writing go to the export
+# queue, and poll_exports reports each finished file in status_label
+EXPORT_POLL_MS = 100
+export_writer = ExportWriter()
+_export_poll = None
+
 def save_final():
+    global _export_poll
     if not bg_image:
         messagebox.showwarning("No Background","Please load a background first!"); return
-    img=bg_image.copy(); draw=ImageDraw.Draw(img)
-    for k,v in vars_map.items():
-        if k in ("Armor","Structure"): continue
-        t=v.get().upper(); d=TEXT_ELEMENTS[k]; f=load_font(d["size"]); pos=tuple(d["pos"])
-        ow=d["outline_width"]; o=d["outline"]
-        if o:
-            for dx in range(-ow,ow+1):
-                for dy in range(-ow,ow+1):
-                    if dx or dy: draw.text((pos[0]+dx,pos[1]+dy),t,font=f,fill=o)
-        draw.text(pos,t,fill=d["fill"],font=f)
-    armor,struct=Image.open(ARMOR_DOT).convert("RGBA"),Image.open(STRUCTURE_DOT).convert("RGBA")
-    if mech_image:
-        mech_scaled = mech_image.resize(tuple(MECH_IMAGE["size"]))
-        img.paste(mech_scaled, tuple(MECH_IMAGE["pos"]), mech_scaled)
-    for label,imgdot in [("Armor",armor),("Structure",struct)]:
-        d=TEXT_ELEMENTS[label]; c=int(vars_map[label].get() or 0)
-        dot=imgdot.resize((d["size"],d["size"]))
-        per_row=d.get("per_row",13); row_gap=d.get("row_gap",5)
-        for i in range(c):
-            row=i//per_row; col=i%per_row
-            x=d["pos"][0]+col*d["spacing"]; y=d["pos"][1]+row*(d["size"]+row_gap)
-            img.paste(dot,(x,y),dot)
-    os.makedirs("output",exist_ok=True)
-    out=f"output/{vars_map['name'].get().strip().replace(' ','_')}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.tiff"
-    img.save(out,dpi=(300,300)); messagebox.showinfo("TIFF Saved",f"Saved image:\n{out}")
+    card = current_card()
+    opts = export_options(*EXPORT_PRESETS[export_preset.get()])
+    ext = export_ext(opts)
+    out=f"{OUTPUT_DIR}/{vars_map['name'].get().strip().replace(' ','_')}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.{ext}"
+    key = RENDER_CACHE.key(card, bg_path, variant=export_variant(opts))
+    if RENDER_CACHE.fetch(key, out, ext):
+        status_label.config(text=f"Card unchanged since last export; linked cached render: {out}"); return
+    export_writer.submit(render_card(card, bg_image), out, opts, on_written=lambda r: RENDER_CACHE.store(key, r["out"], ext))
+    status_label.config(text=f"Exporting {os.path.basename(out)} ({export_writer.pending()} in queue)...")
+    if _export_poll is None:
+        _export_poll = root.after(EXPORT_POLL_MS, poll_exports)
+
+def poll_exports():
+    global _export_poll
+    _export_poll = None
+    busy = export_writer.pending()  # checked first so a result landing after take_results is seen next time
+    for r in export_writer.take_results():
+        if r["error"]:
+            status_label.config(text=f"Export failed: {os.path.basename(r['out'])}")
+            messagebox.showerror("Export Failed", f"{r['out']}\n{r['error']}")
+        else:
+            status_label.config(text=f"Saved {r['out']}: {format_size(r['bytes'])}, encoded in {r['encode']*1000:.0f} ms "
+                                     f"({r['variant']})")
+    if busy:
+        _export_poll = root.after(EXPORT_POLL_MS, poll_exports)
+
+save_final = PROFILER.wrap(save_final)
+
+def on_close():
+    if export_writer.pending():
+        status_label.config(text="Finishing exports..."); root.update_idletasks()
+        export_writer.join()
+    # Launched with --profile: keep the whole session's trace
+    if "--profile" in sys.argv[1:] and PROFILER.has_data():
+        print("profile written to", PROFILER.dump(os.path.join(OUTPUT_DIR, f"profile_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.prof")))
+    root.destroy()
 
 # --- Refresh helpers for UI fields ---
 def refresh_appearance_entries():
@@ -459,5 +580,8 @@ def refresh_mech_entries():
     mech_size_vars["h"].set(str(MECH_IMAGE["size"][1]))
 
 # --- Start ---
+resolve_font_path()
+root.protocol("WM_DELETE_WINDOW", on_close)
+toggle_profiling()
 root.after(100, lambda: load_background(DEFAULT_BG))
 root.mainloop()
@@ -0,0 +1,122 @@
+from collections import deque
+import cProfile, io, os, pstats, threading, time
+
+# --- Live frame statistics for the preview overlay ---
+# Each displayed preview frame contributes its phase timings (seconds, as card_render.lap
+# collects them, plus "photo" for the PhotoImage conversion and "total"). The overlay shows
+# the last frame, the rolling average over ROLLING_FRAMES and frames shown in the last second.
+ROLLING_FRAMES = 30
+PREVIEW_PHASES = ("background", "font", "text", "mech", "dots", "composite", "photo")
+PHASE_LABELS = {"background": "bg", "composite": "comp"}
+
+class FrameStats:
+    def __init__(self, window=ROLLING_FRAMES):
+        self.frames = deque(maxlen=window)
+        self._shown = deque()
+
+    def add(self, timings):
+        self.frames.append(dict(timings))
+        self._shown.append(time.perf_counter())
+
+    def last(self):
+        return self.frames[-1] if self.frames else {}
+
+    def average(self):
+        if not self.frames:
+            return {}
+        keys = {k for f in self.frames for k in f}
+        return {k: sum(f.get(k, 0.0) for f in self.frames) / len(self.frames) for k in keys}
+
+    def rate(self):
+        now = time.perf_counter()
+        while self._shown and now - self._shown[0] > 1.0:
+            self._shown.popleft()
+        return len(self._shown)
+
+def hit_rate(hits, misses):
+    n = hits + misses
+    return f"{100 * hits / n:.0f}%" if n else "-"
+
+def format_frame(stats):
+    last, avg = stats.last(), stats.average()
+    if not last:
+        return "no frames yet"
+    phases = " ".join(f"{PHASE_LABELS.get(p, p)} {last.get(p, 0.0)*1000:.1f}" for p in PREVIEW_PHASES)
+    return (f"frame {last['total']*1000:.1f} ms (avg {avg['total']*1000:.1f}) | {phases} ms | "
+            f"{stats.rate()} redraws/s")
+
+# --- Session profiler ---
+# cProfile hooks are per thread, so profiled sections are wrapped explicitly: the GUI wraps its
+# Tk callbacks and the preview worker wraps each render, each thread collecting into its own
+# Profile. On interpreters where only one profiler may be active at a time, a section that
+# overlaps another thread's runs unprofiled and is counted in stats["skipped"]. dump() merges
+# every thread into one pstats file, which snakeviz, gprof2dot or flameprof turn into a flame
+# graph; a ".txt" path gets the pstats text report instead.
+class SessionProfiler:
+    def __init__(self):
+        self.active = False
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # nesting depth, so a wrapped call inside another is not re-entered
+        self.stats = {"sections": 0, "skipped": 0, "started": None}
+
+    def start(self):
+        with self._lock:
+            self.active = True
+            self.stats["started"] = self.stats["started"] or time.time()
+
+    def stop(self):
+        self.active = False
+
+    def run(self, fn, *args, **kw):
+        if not self.active or getattr(self._local, "depth", 0):
+            return fn(*args, **kw)
+        with self._lock:
+            p, busy = self._profiles.setdefault(threading.get_ident(), (cProfile.Profile(), threading.Lock()))
+        with busy:  # dump() snapshots a profile only between sections
+            try:
+                p.enable()
+            except ValueError:
+                self.stats["skipped"] += 1
+                return fn(*args, **kw)
+            self._local.depth = 1
+            try:
+                return fn(*args, **kw)
+            finally:
+                p.disable()
+                self._local.depth = 0
+                self.stats["sections"] += 1
+
+    def wrap(self, fn):
+        def wrapped(*args, **kw):
+            return self.run(fn, *args, **kw)
+        wrapped.__name__ = fn.__name__
+        return wrapped
+
+    def has_data(self):
+        return bool(self._profiles)
+
+    # Call from outside a profiled section (e.g. an unwrapped button callback)
+    def dump(self, path):
+        with self._lock:
+            profiles = list(self._profiles.values())
+        out = io.StringIO()
+        stats = None
+        for p, busy in profiles:
+            with busy:
+                if stats is None:
+                    stats = pstats.Stats(p, stream=out)
+                else:
+                    stats.add(p)
+        if stats is None:
+            raise ValueError("no profile data collected yet")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path.endswith(".txt"):
+            stats.sort_stats("cumulative").print_stats(60)
+            with open(path, "w") as f:
+                f.write(out.getvalue())
+        else:
+            stats.dump_stats(path)
+        return path
+
+PROFILER = SessionProfiler()
@@ -0,0 +1,365 @@
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont
+from collections import OrderedDict
+from functools import lru_cache
+import os, json, copy, math, re, threading, time
+
+from card_assets import ASSETS
+
+# --- Constants ---
+OUTPUT_SIZE = (2100, 1500)  # 7×5 in @300 DPI
+PREVIEW_SCALE = 0.3
+ZOOM_LEVELS = (PREVIEW_SCALE, 0.6, 1.0)  # preview zoom steps; 1.0 inspects details at output resolution
+ASSETS_DIR = "assets"
+DEFAULT_BG = os.path.join(ASSETS_DIR, "Battletech Card Blank 11-1-25 v1.png")
+ARMOR_DOT = os.path.join(ASSETS_DIR, "armor_dot.png")
+STRUCTURE_DOT = os.path.join(ASSETS_DIR, "structure_dot.png")
+MECH_PICS_DIR = os.path.join(ASSETS_DIR, "mech_pics")
+SAVE_DIR = "saved_cards"
+TEMPLATE_DIR = os.path.join(SAVE_DIR, "templates")
+OUTPUT_DIR = "output"
+DOT_KEYS = ("Armor", "Structure")
+RENDERER_VERSION = 2  # bump when render output changes for the same settings (invalidates cached exports)
+FONT_CANDIDATES = [
+    os.path.join("fonts", "Steiner.otf"),
+    r"C:\\Users\\Jonathan\\AppData\\Local\\Microsoft\\Windows\\Fonts\\STEINER.OTF",
+    "arialbd.ttf",
+]
+FONT_CACHE_SIZE = 32  # distinct (path, size) pairs kept open
+DOT_STRIP_CACHE_SIZE = 256  # (sprite, count, layout, scale) combinations; Spinbox range is 0-50
+# "stroke": one Pillow stroked draw (round corners); "dilate": one glyph raster grown by a square
+# max filter; "square": the original (2*ow+1)^2 offset loop, kept for comparison
+OUTLINE_MODES = ("stroke", "dilate", "square")
+OUTLINE_MODE = "stroke"
+
+# --- Defaults (from your screenshot) ---
+TEXT_DEFAULTS = {
+    "model":  {"pos":[80,40],"size":120,"fill":"#efe31c","outline":"#930000","outline_width":6,"text":""},
+    "name":   {"pos":[80,145],"size":180,"fill":"#930000","outline":"#efe31c","outline_width":6,"text":""},
+    "MV":     {"pos":[1020,480],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
+    "SZ":     {"pos":[260,480],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
+    "TMM":    {"pos":[670,480],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
+    "short":  {"pos":[305,740],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
+    "medium": {"pos":[625,740],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
+    "long":   {"pos":[950,740],"size":120,"fill":"#930000","outline":"#ffffff","outline_width":4,"text":""},
+    "PV":     {"pos":[1785,10],"size":140,"fill":"#930000","outline":"#efe31c","outline_width":4,"text":""},
+    "Armor":     {"count":0,"pos":[180,945],"size":60,"spacing":61,"per_row":13,"row_gap":5},
+    "Structure": {"count":0,"pos":[180,1095],"size":60,"spacing":61,"per_row":13,"row_gap":5},
+}
+
+MECH_DEFAULTS = {
+    "path": None,
+    "pos": [1280, 110],     # X, Y
+    "size": [666, 888],     # Width, Height
+    "aspect_ratio": 666 / 888,
+}
+
+# --- Font loader (path resolved once, FreeTypeFont objects cached per size) ---
+_font_path = None
+_font_cache = OrderedDict()
+_font_lock = threading.Lock()
+font_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def resolve_font_path():
+    global _font_path
+    if _font_path is None:
+        _font_path = ""
+        for p in FONT_CANDIDATES:
+            try:
+                ImageFont.truetype(p, 12)
+            except Exception:
+                continue
+            _font_path = p
+            break
+    return _font_path
+
+def load_font(size):
+    key = (resolve_font_path(), size)
+    with _font_lock:
+        f = _font_cache.get(key)
+        if f is not None:
+            _font_cache.move_to_end(key)
+            font_stats["hits"] += 1
+            return f
+        font_stats["misses"] += 1
+        f = ImageFont.truetype(key[0], size) if key[0] else ImageFont.load_default()
+        _font_cache[key] = f
+        if len(_font_cache) > FONT_CACHE_SIZE:
+            _font_cache.popitem(last=False)
+            font_stats["evictions"] += 1
+        return f
+
+def font_cache_info():
+    return dict(font_stats, size=len(_font_cache), maxsize=FONT_CACHE_SIZE, path=resolve_font_path())
+
+def clear_font_cache():
+    with _font_lock:
+        _font_cache.clear()
+        font_stats.update(hits=0, misses=0, evictions=0)
+
+# --- Card settings (same layout save_settings writes) ---
+def default_card():
+    card = copy.deepcopy(TEXT_DEFAULTS)
+    card["MechImage"] = copy.deepcopy(MECH_DEFAULTS)
+    return card
+
+def normalize_card(data):
+    # Fill missing keys from defaults so partial/older files still render
+    data = dict(data)
+    if "title" in data and "model" not in data:
+        data["model"] = data.pop("title")
+    card = default_card()
+    for k, v in data.items():
+        if k in card and isinstance(v, dict):
+            card[k].update(copy.deepcopy(v))
+    return card
+
+# --- Template + delta settings ---
+# A delta file is {"template": <name or path>, "overrides": {...}}: only the values that differ
+# from a shared layout template. Plain per-card files (as save_settings writes) load unchanged.
+_templates = {}  # (abspath, mtime) -> resolved settings
+
+def is_delta(data):
+    return isinstance(data, dict) and "template" in data and "overrides" in data
+
+def apply_delta(base, overrides):
+    out = copy.deepcopy(base)
+    for k, v in overrides.items():
+        if isinstance(v, dict) and isinstance(out.get(k), dict):
+            out[k] = apply_delta(out[k], v)
+        else:
+            out[k] = copy.deepcopy(v)
+    return out
+
+def card_delta(card, template):
+    delta = {}
+    for k, v in card.items():
+        t = template.get(k)
+        if isinstance(v, dict) and isinstance(t, dict):
+            d = {f: fv for f, fv in v.items() if t.get(f, object()) != fv}
+            if d:
+                delta[k] = d
+        elif v != t:
+            delta[k] = copy.deepcopy(v)
+    return delta
+
+def template_path(ref, relative_to="."):
+    if os.sep not in ref and "/" not in ref and not ref.endswith(".json"):
+        return os.path.join(TEMPLATE_DIR, f"{ref}.json")
+    p = os.path.join(relative_to, ref)
+    return p if os.path.exists(p) else ref
+
+def read_settings(path):
+    with open(path) as f:
+        data = json.load(f)
+    if is_delta(data):
+        tpath = template_path(data["template"], os.path.dirname(path))
+        key = (os.path.abspath(tpath), os.path.getmtime(tpath))
+        if key not in _templates:
+            _templates[key] = read_settings(tpath)
+        data = apply_delta(_templates[key], data["overrides"])
+    return data
+
+def load_card(path):
+    return normalize_card(read_settings(path))
+
+def text_keys(card):
+    return [k for k in TEXT_DEFAULTS if k not in DOT_KEYS and k in card]
+
+def card_basename(card):
+    model = card["model"].get("text", "").strip().upper() or "UNTITLED"
+    name = card["name"].get("text", "").strip().upper() or "CARD"
+    # Names like "TIMBER WOLF/MAD CAT" must not turn into directories (or invalid names on Windows)
+    return re.sub(r'[\\/:*?"<>|]', "-", f"{model}_{name}")
+
+# Saved paths may come from Windows ("assets\\mech_pics\\x.png"); fall back to the mech_pics folder by file name
+def resolve_mech_path(p):
+    if not p:
+        return None
+    p = p.replace("\\", "/")
+    if os.path.exists(p):
+        return p
+    alt = os.path.join(MECH_PICS_DIR, os.path.basename(p))
+    return alt if os.path.exists(alt) else None
+
+def file_mtime(path):
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+# Saved cards point at pictures that are not all bundled; give those the bundled ones in turn
+# (benchmarks and checks need every layer present). cards is a list of (label, card) pairs.
+def fill_missing_mechs(cards):
+    pics = sorted(p for p in (os.path.join(MECH_PICS_DIR, n) for n in os.listdir(MECH_PICS_DIR)
+                              if n.lower().endswith(".png")) if os.path.isfile(p)) if os.path.isdir(MECH_PICS_DIR) else []
+    for i, (_, card) in enumerate(cards):
+        if pics and not resolve_mech_path(card["MechImage"].get("path")):
+            card["MechImage"]["path"] = pics[i % len(pics)]
+    return cards
+
+# --- Asset loading (decoded and resized images come from the shared cache) ---
+def load_background(path=DEFAULT_BG, size=OUTPUT_SIZE):
+    return ASSETS.get(path, size)
+
+def load_mech(path, size=None):
+    path = resolve_mech_path(path)
+    return ASSETS.get(path, size) if path else None
+
+def load_dots(size=None):
+    return ASSETS.get(ARMOR_DOT, size), ASSETS.get(STRUCTURE_DOT, size)
+
+# --- Dot strips (whole Armor/Structure pip grid built once and composited in one go) ---
+@lru_cache(maxsize=DOT_STRIP_CACHE_SIZE)
+def dot_grid(count, size, spacing, per_row, row_gap, scale=1.0):
+    # Pip offsets relative to the strip origin (the element's pos)
+    return tuple((round(col*spacing*scale), round(row*(size + row_gap)*scale))
+                 for row, col in (divmod(i, per_row) for i in range(count)))
+
+@lru_cache(maxsize=DOT_STRIP_CACHE_SIZE)
+def _dot_strip(sprite_path, mtime, count, size, spacing, per_row, row_gap, scale):
+    if count <= 0:
+        return None
+    dot = ASSETS.get(sprite_path, (scaled(size, scale),)*2)
+    pts = dot_grid(count, size, spacing, per_row, row_gap, scale)
+    w = max(p[0] for p in pts) + dot.width
+    h = max(p[1] for p in pts) + dot.height
+    strip = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    for p in pts:
+        strip.alpha_composite(dot, p)
+    return strip
+
+def dot_strip(label, d, scale=1.0):
+    sprite_path = ARMOR_DOT if label == "Armor" else STRUCTURE_DOT
+    mtime = file_mtime(sprite_path)
+    if mtime is None:
+        return None  # a missing pip sprite leaves the track empty rather than failing the card
+    return _dot_strip(sprite_path, mtime, int(d.get("count") or 0), int(d["size"]),
+                      d["spacing"], int(d.get("per_row", 13)), int(d.get("row_gap", 5)), scale)
+
+def dot_strip_info():
+    return {"grid": dot_grid.cache_info()._asdict(), "strip": _dot_strip.cache_info()._asdict()}
+
+# Alpha-composite a sprite at pos, clipping anything left of/above the canvas
+def composite_at(img, sprite, pos):
+    x, y = int(pos[0]), int(pos[1])
+    if x < 0 or y < 0:
+        sprite = sprite.crop((max(0, -x), max(0, -y), sprite.width, sprite.height))
+        x, y = max(0, x), max(0, y)
+    if sprite.width and sprite.height and x < img.width and y < img.height:
+        img.alpha_composite(sprite, (x, y))
+
+# --- Outlined text ---
+def draw_outlined_text(img, draw, pos, text, font, fill, outline, ow, mode=None):
+    mode = mode or OUTLINE_MODE
+    if not outline or ow <= 0:
+        draw.text(pos, text, fill=fill, font=font)
+    elif mode == "stroke":
+        draw.text(pos, text, fill=fill, font=font, stroke_width=ow, stroke_fill=outline)
+    elif mode == "dilate":
+        l, t, r, b = draw.textbbox(pos, text, font=font)
+        if r > l and b > t:
+            x0, y0 = int(l) - ow - 1, int(t) - ow - 1
+            mask = Image.new("L", (int(r) - x0 + ow + 1, int(b) - y0 + ow + 1), 0)
+            ImageDraw.Draw(mask).text((pos[0] - x0, pos[1] - y0), text, fill=255, font=font)
+            img.paste(outline, (x0, y0, x0 + mask.width, y0 + mask.height), mask.filter(ImageFilter.MaxFilter(2*ow + 1)))
+        draw.text(pos, text, fill=fill, font=font)
+    else:
+        for dx in range(-ow, ow+1):
+            for dy in range(-ow, ow+1):
+                if dx or dy: draw.text((pos[0]+dx, pos[1]+dy), text, font=font, fill=outline)
+        draw.text(pos, text, fill=fill, font=font)
+
+# --- Phase timing (pass a dict to collect seconds per phase; None costs one perf_counter call) ---
+def lap(timings, phase, t0):
+    now = time.perf_counter()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + now - t0
+    return now
+
+def clear_caches():
+    clear_font_cache(); ASSETS.clear()
+    dot_grid.cache_clear(); _dot_strip.cache_clear()
+
+# --- Card layers (the one composition used by render_card and the preview compositor) ---
+# Each layer is (name, key, render): key captures every input at the given scale, and
+# render(timings) returns the layer's RGBA sprite and its offset on the scaled canvas, or
+# (None, offset) when there is nothing to draw. Layers are listed in draw order.
+def scaled(v, scale):
+    return max(1, round(v*scale)) if v > 0 else 0
+
+def text_layer(d, scale=1.0, outline_mode=None):
+    key = ("text", str(d.get("text", "")).upper(), scaled(d["size"], scale), d["fill"], d["outline"],
+           scaled(d["outline_width"], scale), d["pos"][0]*scale, d["pos"][1]*scale, outline_mode or OUTLINE_MODE)
+    def render(timings=None):
+        _, t, size, fill, outline, ow, px, py, mode = key
+        if not t or not size:
+            return None, (0, 0)
+        tp = time.perf_counter()
+        f = load_font(size)
+        tp = lap(timings, "font", tp)
+        l, top, r, b = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((px, py), t, font=f)
+        pad = ow + 2
+        # Keep the draw origin non-negative: Pillow splits fractional coordinates with modf,
+        # so a negative origin would shift the glyphs by a pixel relative to drawing in place
+        ox, oy = min(int(l) - pad, math.floor(px)), min(int(top) - pad, math.floor(py))
+        # Transparent pixels carry the edge colour so antialiased borders don't darken when composited
+        sprite = Image.new("RGBA", (int(r) - ox + pad, int(b) - oy + pad), outline if outline and ow else fill)
+        sprite.putalpha(0)
+        draw_outlined_text(sprite, ImageDraw.Draw(sprite), (px - ox, py - oy), t, f, fill, outline, ow, mode)
+        lap(timings, "text", tp)
+        return sprite, (ox, oy)
+    return key, render
+
+# mech_source(path, size) supplies the scaled picture (the GUI passes the thumbnail library)
+def mech_layer(m, scale=1.0, mech_source=None):
+    path = resolve_mech_path(m.get("path"))
+    size = (scaled(m["size"][0], scale), scaled(m["size"][1], scale))
+    pos = (int(m["pos"][0]*scale), int(m["pos"][1]*scale))
+    key = ("mech", path, file_mtime(path), size, pos)
+    def render(timings=None):
+        if not path or not size[0] or not size[1]:
+            return None, pos
+        tp = time.perf_counter()
+        sprite = (mech_source or load_mech)(path, size)
+        lap(timings, "mech", tp)
+        return sprite, pos
+    return key, render
+
+def dot_layer(label, d, scale=1.0):
+    key = ("dots", label, int(d.get("count") or 0), d["pos"][0], d["pos"][1], int(d["size"]), d["spacing"],
+           int(d.get("per_row", 13)), int(d.get("row_gap", 5)), scale)
+    pos = (int(d["pos"][0]*scale), int(d["pos"][1]*scale))
+    def render(timings=None):
+        tp = time.perf_counter()
+        strip = dot_strip(label, d, scale)
+        lap(timings, "dots", tp)
+        return strip, pos
+    return key, render
+
+def card_layers(card, scale=1.0, outline_mode=None, mech_source=None):
+    layers = [(k,) + text_layer(card[k], scale, outline_mode) for k in text_keys(card)]
+    layers.append(("mech",) + mech_layer(card["MechImage"], scale, mech_source))
+    layers += [(k,) + dot_layer(k, card[k], scale) for k in DOT_KEYS]
+    return layers
+
+def scaled_size(scale):
+    return (int(OUTPUT_SIZE[0]*scale), int(OUTPUT_SIZE[1]*scale))
+
+# --- Card render at any scale (1.0 = print output) ---
+def render_card(card, bg=None, outline_mode=None, timings=None, scale=1.0, mech_source=None):
+    tp = time.perf_counter()
+    img = (bg if bg is not None else load_background(size=scaled_size(scale))).copy()
+    lap(timings, "background", tp)
+    for _, _, render in card_layers(card, scale, outline_mode, mech_source):
+        sprite, pos = render(timings)
+        if sprite is not None:
+            composite_at(img, sprite, pos)
+    return img
+
+# --- Pixel diff between two renders (e.g. outline modes) ---
+def pixel_diff(a, b, threshold=32):
+    diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB")).convert("L")
+    hist = diff.histogram(); total = a.width * a.height
+    changed = sum(hist[threshold:])
+    return {"mean": sum(i*n for i, n in enumerate(hist)) / total, "max": diff.getextrema()[1],
+            "changed_pct": 100.0 * changed / total, "bbox": diff.getbbox()}
@@ -0,0 +1,189 @@
+"""Print-sheet imposition: tile rendered cards onto press sheets with bleed and crop marks.
+
+    python card_sheets.py [cards ...] [-o output/sheets.pdf] [--sheet 13x19] [--bleed 0.125] [-j workers]
+
+Cards are rendered one at a time and pasted straight onto the current sheet; each finished
+sheet is appended to the multi-page TIFF/PDF and dropped, so memory holds one sheet plus the
+cards in flight rather than the whole roster.
+"""
+from PIL import Image, ImageDraw, TiffImagePlugin
+from collections import deque
+from multiprocessing import Pool
+import argparse, os, sys, time
+
+import card_batch, card_export, card_render
+from card_render import OUTPUT_SIZE
+
+DPI = 300
+SHEET_SIZES = {  # inches, portrait
+    "letter": (8.5, 11), "legal": (8.5, 14), "tabloid": (11, 17),
+    "a4": (8.27, 11.69), "a3": (11.69, 16.54), "12x18": (12, 18), "13x19": (13, 19),
+}
+MARK_COLOR = (0, 0, 0)
+MARK_WIDTH = 2      # px at 300 DPI
+MARK_LENGTH = 0.25  # inches
+MARK_OFFSET = 0.0625  # gap between the bleed edge and the start of a mark, inches
+
+def px(inches):
+    return int(round(inches * DPI))
+
+def parse_sheet(name):
+    if name.lower() in SHEET_SIZES:
+        return SHEET_SIZES[name.lower()]
+    w, _, h = name.lower().partition("x")
+    try:
+        size = float(w), float(h)
+    except ValueError:
+        raise ValueError(f"unknown sheet size {name!r}: use {', '.join(SHEET_SIZES)} or WxH in inches") from None
+    if size[0] <= 0 or size[1] <= 0:
+        raise ValueError(f"sheet size must be positive: {name!r}")
+    return size
+
+# --- Layout ---
+class SheetLayout:
+    def __init__(self, sheet=(13, 19), bleed=0.125, margin=0.25, gutter=0.0, card_size=OUTPUT_SIZE):
+        self.bleed, self.card = px(bleed), card_size
+        cell_w, cell_h = card_size[0] + 2*self.bleed, card_size[1] + 2*self.bleed
+        g, m = px(gutter), px(margin)
+        best = None
+        for w, h in (sheet, sheet[::-1]):  # pick the orientation that fits more cards
+            sw, sh = px(w), px(h)
+            cols = max(0, (sw - 2*m + g) // (cell_w + g))
+            rows = max(0, (sh - 2*m + g) // (cell_h + g))
+            if best is None or cols*rows > best[2]*best[3]:
+                best = (sw, sh, cols, rows)
+        self.size = best[:2]
+        self.cols, self.rows = best[2], best[3]
+        if not self.per_sheet:
+            raise ValueError(f"A {card_size[0]}x{card_size[1]} card with bleed does not fit on a {sheet[0]}x{sheet[1]} in sheet")
+        grid_w = self.cols*cell_w + (self.cols - 1)*g
+        grid_h = self.rows*cell_h + (self.rows - 1)*g
+        self.origin = ((self.size[0] - grid_w) // 2, (self.size[1] - grid_h) // 2)
+        self.cells = [(self.origin[0] + c*(cell_w + g), self.origin[1] + r*(cell_h + g))
+                      for r in range(self.rows) for c in range(self.cols)]
+        self.grid = (self.origin[0], self.origin[1], self.origin[0] + grid_w, self.origin[1] + grid_h)
+
+    @property
+    def per_sheet(self):
+        return self.cols * self.rows
+
+    def trim_box(self, i):
+        x, y = self.cells[i]
+        return (x + self.bleed, y + self.bleed, x + self.bleed + self.card[0], y + self.bleed + self.card[1])
+
+# --- Sheet drawing ---
+def paste_with_bleed(sheet, card, cell, bleed):
+    x, y = cell[0] + bleed, cell[1] + bleed
+    sheet.paste(card, (x, y))
+    if bleed <= 0:
+        return
+    w, h = card.size
+    # Stretch the outermost pixel rows/columns into the bleed, then fill the corners
+    sheet.paste(card.crop((0, 0, w, 1)).resize((w, bleed)), (x, y - bleed))
+    sheet.paste(card.crop((0, h - 1, w, h)).resize((w, bleed)), (x, y + h))
+    sheet.paste(card.crop((0, 0, 1, h)).resize((bleed, h)), (x - bleed, y))
+    sheet.paste(card.crop((w - 1, 0, w, h)).resize((bleed, h)), (x + w, y))
+    for cx, cy, dx, dy in ((0, 0, -bleed, -bleed), (w - 1, 0, w, -bleed), (0, h - 1, -bleed, h), (w - 1, h - 1, w, h)):
+        sheet.paste(card.getpixel((cx, cy)), (x + dx, y + dy, x + dx + bleed, y + dy + bleed))
+
+def draw_crop_marks(sheet, layout, used):
+    draw = ImageDraw.Draw(sheet)
+    length, off = px(MARK_LENGTH), px(MARK_OFFSET)
+    gx0, gy0, gx1, gy1 = layout.grid
+    xs, ys = set(), set()
+    for i in range(used):
+        l, t, r, b = layout.trim_box(i)
+        xs.update((l, r)); ys.update((t, b))
+    for x in xs:
+        draw.line([(x, max(0, gy0 - off - length)), (x, gy0 - off)], fill=MARK_COLOR, width=MARK_WIDTH)
+        draw.line([(x, gy1 + off), (x, min(sheet.height, gy1 + off + length))], fill=MARK_COLOR, width=MARK_WIDTH)
+    for y in ys:
+        draw.line([(max(0, gx0 - off - length), y), (gx0 - off, y)], fill=MARK_COLOR, width=MARK_WIDTH)
+        draw.line([(gx1 + off, y), (min(sheet.width, gx1 + off + length), y)], fill=MARK_COLOR, width=MARK_WIDTH)
+
+def impose(cards, layout, marks=True):
+    # cards: iterable of full-size card images; yields finished RGB sheets
+    sheet, used = None, 0
+    for card in cards:
+        if sheet is None:
+            sheet, used = Image.new("RGB", layout.size, "white"), 0
+        paste_with_bleed(sheet, card.convert("RGB"), layout.cells[used], layout.bleed)
+        used += 1
+        if used == layout.per_sheet:
+            if marks: draw_crop_marks(sheet, layout, used)
+            yield sheet
+            sheet = None
+    if sheet is not None:
+        if marks: draw_crop_marks(sheet, layout, used)
+        yield sheet
+
+# --- Streaming multi-page writers ---
+def write_sheets(sheets, out, compression="tiff_lzw", pdf_quality=card_export.PDF_QUALITY):
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    n = 0
+    if out.lower().endswith(".pdf"):
+        for sheet in sheets:
+            sheet.save(out, "PDF", resolution=DPI, quality=pdf_quality, append=n > 0)
+            n += 1
+        return n
+    with open(out, "w+b") as fp, TiffImagePlugin.AppendingTiffWriter(fp) as tf:
+        for sheet in sheets:
+            sheet.save(tf, format="TIFF", compression=None if compression == "none" else compression, dpi=(DPI, DPI))
+            tf.newFrame()
+            n += 1
+    return n
+
+# --- Card source ---
+def _render_path(src):
+    card = src[1] if isinstance(src, tuple) else card_render.load_card(src)
+    return card_render.render_card(card, card_batch._bg).convert("RGB")
+
+# In order, with at most workers*2 renders in flight: a finished card waits in the parent until
+# impose() takes it, so jobs are submitted only as results are consumed
+def render_cards(paths, workers=1, bg_path=card_render.DEFAULT_BG):
+    if workers <= 1:
+        card_batch._init_worker(bg_path)
+        for p in paths:
+            yield _render_path(p)
+        return
+    paths = iter(paths)
+    with Pool(workers, initializer=card_batch._init_worker, initargs=(bg_path,)) as pool:
+        pending = deque(pool.apply_async(_render_path, (p,)) for _, p in zip(range(workers*2), paths))
+        while pending:
+            img = pending.popleft().get()
+            for p in paths:
+                pending.append(pool.apply_async(_render_path, (p,)))
+                break
+            yield img
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tile saved cards onto print sheets as multi-page TIFF or PDF.")
+    ap.add_argument("cards", nargs="*", default=[card_render.SAVE_DIR], help="settings JSON files or directories")
+    ap.add_argument("-o", "--output", default=os.path.join(card_render.OUTPUT_DIR, "sheets.pdf"), help=".pdf or .tif/.tiff")
+    ap.add_argument("--sheet", default="13x19", help=f"sheet size: {', '.join(SHEET_SIZES)} or WxH in inches")
+    ap.add_argument("--bleed", type=float, default=0.125, help="bleed per edge, inches")
+    ap.add_argument("--margin", type=float, default=0.25, help="minimum sheet margin, inches")
+    ap.add_argument("--gutter", type=float, default=0.0, help="gap between card bleeds, inches")
+    ap.add_argument("--no-marks", action="store_true", help="omit crop marks")
+    ap.add_argument("--compression", default="tiff_lzw", choices=["none", "tiff_lzw", "tiff_adobe_deflate"], help="TIFF only")
+    ap.add_argument("--pdf-quality", type=int, default=card_export.PDF_QUALITY, help="JPEG quality of PDF pages (1-100)")
+    ap.add_argument("-j", "--workers", type=int, default=1, help="render worker processes")
+    ap.add_argument("--background", default=card_render.DEFAULT_BG, help="card background image")
+    a = ap.parse_args(argv)
+
+    paths = [p for src in a.cards for p in card_batch.find_cards(src)]
+    if not paths:
+        print("No settings files found"); return 1
+    try:
+        layout = SheetLayout(parse_sheet(a.sheet), a.bleed, a.margin, a.gutter)
+    except ValueError as e:
+        ap.error(str(e))
+    t0 = time.perf_counter()
+    sheets = impose(render_cards(paths, a.workers, a.background), layout, not a.no_marks)
+    n = write_sheets(sheets, a.output, a.compression, a.pdf_quality)
+    print(f"{len(paths)} cards on {n} sheet(s) ({layout.cols}x{layout.rows} per {layout.size[0]}x{layout.size[1]} px sheet) "
+          f"-> {a.output} in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Compact card store: shared layout templates plus per-card overrides in one indexed file.
+
+    python card_store.py pack [cards ...] -o roster.db [--template saved_cards/X.json] [--template-name default]
+    python card_store.py unpack roster.db [-o dir] [--delta]
+    python card_store.py list roster.db
+
+The store is an SQLite file. Each template (a full settings dict) is stored once; each card row
+holds its template name and only the values that differ from it. Loading resolves template +
+overrides with the template parsed once, so thousands of cards load from a single file.
+"""
+import argparse, json, os, sqlite3, sys, time
+
+import card_render
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS cards (
+    name TEXT PRIMARY KEY,
+    template TEXT NOT NULL REFERENCES templates(name),
+    overrides TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cards_template ON cards(template);
+"""
+
+class CardStore:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self._templates = {}  # name -> normalized template as JSON text; json.loads beats deepcopy per card
+
+    def close(self):
+        self.db.commit(); self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Templates ---
+    def put_template(self, name, settings):
+        self.db.execute("INSERT OR REPLACE INTO templates VALUES (?, ?)", (name, json.dumps(settings, sort_keys=True)))
+        self._templates.pop(name, None)
+
+    def template(self, name):
+        if name not in self._templates:
+            row = self.db.execute("SELECT data FROM templates WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise KeyError(f"template not in store: {name}")
+            self._templates[name] = json.dumps(card_render.normalize_card(json.loads(row[0])))
+        return json.loads(self._templates[name])
+
+    def template_names(self):
+        return [r[0] for r in self.db.execute("SELECT name FROM templates ORDER BY name")]
+
+    # --- Cards ---
+    def put(self, name, card, template="default"):
+        delta = card_render.card_delta(card, self.template(template))
+        self.db.execute("INSERT OR REPLACE INTO cards VALUES (?, ?, ?)", (name, template, json.dumps(delta, sort_keys=True)))
+
+    def overrides(self, name):
+        row = self.db.execute("SELECT template, overrides FROM cards WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(f"card not in store: {name}")
+        return row[0], json.loads(row[1])
+
+    def _resolve(self, template, delta):
+        card = self.template(template)
+        for k, v in delta.items():
+            if isinstance(v, dict) and isinstance(card.get(k), dict):
+                card[k].update(v)
+        return card
+
+    def get(self, name):
+        return self._resolve(*self.overrides(name))
+
+    def names(self):
+        return [r[0] for r in self.db.execute("SELECT name FROM cards ORDER BY name")]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def iter_cards(self):
+        # Streams (name, resolved card) in name order
+        for name, template, delta in self.db.execute("SELECT name, template, overrides FROM cards ORDER BY name"):
+            yield name, self._resolve(template, json.loads(delta))
+
+# --- Command line ---
+def pack(paths, out, template_path=None, template_name="default"):
+    import card_batch
+    files = [p for src in paths for p in card_batch.find_cards(src)]
+    template = card_render.load_card(template_path) if template_path else card_render.default_card()
+    for k in card_render.text_keys(template):
+        template[k]["text"] = ""
+    for k in card_render.DOT_KEYS:
+        template[k]["count"] = 0
+    with CardStore(out) as store:
+        store.put_template(template_name, template)
+        for src in files:  # settings paths, or (name, card) pairs from another store
+            name, card = src if isinstance(src, tuple) else (os.path.splitext(os.path.basename(src))[0], card_render.load_card(src))
+            store.put(name, card, template_name)
+    return len(files)
+
+def unpack(store_path, out_dir, delta=False):
+    os.makedirs(out_dir, exist_ok=True)
+    n = 0
+    with CardStore(store_path) as store:
+        if delta:
+            tdir = os.path.join(out_dir, "templates")
+            os.makedirs(tdir, exist_ok=True)
+            for t in store.template_names():
+                with open(os.path.join(tdir, f"{t}.json"), "w") as f:
+                    json.dump(store.template(t), f, indent=4)
+        for name in store.names():
+            if delta:
+                template, overrides = store.overrides(name)
+                data = {"template": f"templates/{template}.json", "overrides": overrides}
+            else:
+                data = store.get(name)
+            with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
+                json.dump(data, f, indent=4)
+            n += 1
+    return n
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pack saved cards into a template + overrides store, or unpack them again.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="store settings JSON files (full or delta) as overrides of one template")
+    p.add_argument("cards", nargs="*", default=[card_render.SAVE_DIR])
+    p.add_argument("-o", "--output", required=True, help="store file to create or update")
+    p.add_argument("--template", default=None, help="settings file used as the shared layout (default: built-in defaults)")
+    p.add_argument("--template-name", default="default")
+    u = sub.add_parser("unpack", help="write each stored card back out as a settings JSON file")
+    u.add_argument("store")
+    u.add_argument("-o", "--output", default=card_render.SAVE_DIR)
+    u.add_argument("--delta", action="store_true", help="write template files plus per-card delta files")
+    ls = sub.add_parser("list", help="list stored cards and the size of their overrides")
+    ls.add_argument("store")
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if a.cmd == "pack":
+        n = pack(a.cards, a.output, a.template, a.template_name)
+        print(f"packed {n} card(s) into {a.output} in {time.perf_counter() - t0:.2f}s")
+    elif a.cmd == "unpack":
+        n = unpack(a.store, a.output, a.delta)
+        print(f"wrote {n} card(s) to {a.output} in {time.perf_counter() - t0:.2f}s")
+    else:
+        with CardStore(a.store) as store:
+            for name in store.names():
+                template, overrides = store.overrides(name)
+                print(f"{name:<40} {template:<12} {len(json.dumps(overrides)):>6} bytes of overrides")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())